@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import pickle
+import argparse
+import tempfile
+import functools
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml'))
+from embeddings import PhraseEmbedder
+from mentor_store import MentorStore
+from model_bundle import load_serving_bundle, predict_scores
+from synthetic import generate_mentors, generate_student, train_word2vec
+
+def load_scorer(model_path=None):
+    """
+    Match scores of a feature matrix as the prediction worker computes them.
+
+    Uses the model at model_path, or a freshly created one (see
+    create_model.py) when none is given.
+    """
+    if model_path is None:
+        from create_model import create_model
+        with tempfile.TemporaryDirectory() as model_dir:
+            model_path = os.path.join(model_dir, 'ml_model.pkl')
+            create_model(model_path)
+            bundle = load_serving_bundle(model_path)
+    else:
+        bundle = load_serving_bundle(model_path)
+    return functools.partial(predict_scores, bundle)
+
+def top_k(scores, k):
+    return -np.sort(-scores)[:k]
+
+def run(n_mentors, k, candidates, n_students, word2vec_model, score, seed):
+    store = MentorStore(PhraseEmbedder(word2vec_model.wv))
+    store.register(generate_mentors(n_mentors, seed))
+    all_slots = store.resolve()
+
+    # Train the index up front so it is not charged to the first query
+    store.candidates(generate_student(seed), candidates)
+
+    recalls, exact_times, ann_times = [], [], []
+    for i in range(n_students):
+        student = generate_student(seed + 100 + i)
+
+        start = time.perf_counter()
+        exact_scores = top_k(score(store.feature_matrix(student, all_slots)), k)
+        exact_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        slots = store.candidates(student, candidates)
+        approx_scores = top_k(score(store.feature_matrix(student, slots)), k)
+        ann_times.append(time.perf_counter() - start)
+
+        # Match scores are whole numbers, so any mentor tied with the k-th
+        # exhaustive score is as good a pick as the one the sort kept
+        recalls.append(np.sum(approx_scores >= exact_scores[-1]) / k)
+
+    exact_ms = 1000 * np.median(exact_times)
+    ann_ms = 1000 * np.median(ann_times)
+    print(f"{n_mentors:>8} mentors  k={k:<3} C={candidates:<5} "
+          f"recall@k={np.mean(recalls):.3f}  exhaustive={exact_ms:8.2f} ms  "
+          f"ann={ann_ms:8.2f} ms  speedup={exact_ms / ann_ms:5.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall and speed of ANN candidate retrieval")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--candidates', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--students', type=int, default=20)
+    parser.add_argument('--word2vec', help="pickled Word2Vec model (defaults to a synthetic one)")
+    parser.add_argument('--model', help="match model file (defaults to a freshly created one)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.word2vec:
+        with open(args.word2vec, 'rb') as f:
+            word2vec_model = pickle.load(f)
+    else:
+        word2vec_model = train_word2vec(args.seed)
+    score = load_scorer(args.model)
+
+    for size in args.sizes:
+        for candidates in args.candidates:
+            run(size, args.k, candidates, args.students, word2vec_model, score, args.seed)
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import tempfile
+import platform
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'ml'))
+sys.path.insert(0, BACKEND_DIR)
+from synthetic import generate_mentors, generate_student, generate_texts, train_word2vec
+
+# The committed baseline was saved (--save-baseline, default sizes) from the tree
+# that introduced this script, before the later performance work. Timings only
+# compare on one machine: check out that commit in a worktree and save a local
+# baseline there, or save one before starting a change, then run without the flag.
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SENTIMENT_MODEL_PATH = os.path.join(BACKEND_DIR, '..', 'src', 'sentiment_model.pkl')
+
+# Per-pair Python paths get slow at the top sizes; skip them above this unless --full
+PER_ITEM_LIMIT = 10000
+
+def measure(fn, repeat, setup=None):
+    """Best-of-`repeat` wall time of fn() in seconds; setup() runs untimed before each run"""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def load_hot_paths(word2vec_model):
+    """
+    The functions under test, bound to the synthetic models.
+
+    server.py is imported for create_feature_vector, with its feedback store in
+    memory so that benchmarking leaves no files behind, and its models loaded
+    before the import returns so the loader cannot replace word2vec_model later.
+    """
+    os.environ.setdefault('FEEDBACK_DB', ':memory:')
+    os.environ.setdefault('MODEL_LOADING', 'eager')
+    import server
+    import predict
+    from features import build_feature_matrix
+    from embeddings import get_embedder
+    from model_bundle import load_bundle, load_serving_bundle, predict_scores
+    from create_model import create_model
+    from sentiment_analyzer import analyze_texts, resolve_model
+
+    server.word2vec_model = word2vec_model
+    with tempfile.TemporaryDirectory() as model_dir:
+        model_path = os.path.join(model_dir, 'ml_model.pkl')
+        create_model(model_path)
+        bundles = {"sklearn": load_bundle(model_path), "compiled": load_serving_bundle(model_path)}
+
+    return {
+        "server": server,
+        "predict": predict,
+        "build_feature_matrix": build_feature_matrix,
+        "embedder": get_embedder(word2vec_model),
+        "predict_scores": predict_scores,
+        "bundles": bundles,
+        "analyze_texts": analyze_texts,
+        "sentiment_model": resolve_model(SENTIMENT_MODEL_PATH),
+    }
+
+def build_cases(paths, word2vec_model, student, mentors, texts, full):
+    """(name, skipped above PER_ITEM_LIMIT?, fn(n)) for every benchmarked hot path"""
+    server, predict = paths["server"], paths["predict"]
+    build_feature_matrix, embedder = paths["build_feature_matrix"], paths["embedder"]
+    predict_scores, bundles = paths["predict_scores"], paths["bundles"]
+    analyze_texts, sentiment_model = paths["analyze_texts"], paths["sentiment_model"]
+    features = build_feature_matrix(student, mentors, embedder)
+
+    cases = [
+        ("create_feature_vector", True,
+         lambda n: [server.create_feature_vector(student, mentor) for mentor in mentors[:n]]),
+        ("extract_features", True,
+         lambda n: [predict.extract_features(student, mentor, word2vec_model) for mentor in mentors[:n]]),
+        ("calculate_text_similarity", True,
+         lambda n: [predict.calculate_text_similarity(student['bio'], mentor['bio'], word2vec_model)
+                    for mentor in mentors[:n]]),
+        ("build_feature_matrix", False,
+         lambda n: build_feature_matrix(student, mentors[:n], embedder)),
+        ("model_inference[sklearn]", False,
+         lambda n: predict_scores(bundles["sklearn"], features[:n])),
+        ("model_inference[compiled]", False,
+         lambda n: predict_scores(bundles["compiled"], features[:n])),
+        ("batch_analyze", False,
+         lambda n: analyze_texts(texts[:n], sentiment_model)),
+    ]
+    return [(name, per_item and not full, fn) for name, per_item, fn in cases]
+
+def run(sizes, repeat, seed, word2vec_model, full=False):
+    student = generate_student(seed)
+    mentors = generate_mentors(max(sizes), seed)
+    texts = generate_texts(max(sizes), seed)
+    paths = load_hot_paths(word2vec_model)
+
+    results = {}
+    for name, limited, fn in build_cases(paths, word2vec_model, student, mentors, texts, full):
+        for n in sizes:
+            if limited and n > PER_ITEM_LIMIT:
+                continue
+            # Every run starts cold: phrase vectors are computed, not reused from the last run
+            seconds = measure(lambda: fn(n), repeat, setup=paths["embedder"].clear)
+            results[f"{name}@{n}"] = seconds
+            print(f"{name:<28} n={n:<7} {seconds * 1000:10.2f} ms  {seconds / n * 1e6:9.2f} us/item")
+    return results
+
+def compare(results, baseline, threshold):
+    """Names whose time grew by more than `threshold` (a fraction) over the baseline"""
+    regressions = []
+    for key, seconds in sorted(results.items()):
+        before = baseline.get(key)
+        if before is None or before <= 0:
+            continue
+        change = seconds / before - 1
+        marker = "REGRESSION" if change > threshold else ""
+        print(f"{key:<40} {before * 1000:10.2f} ms -> {seconds * 1000:10.2f} ms  {change:+7.1%} {marker}")
+        if change > threshold:
+            regressions.append(key)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the matching and sentiment hot paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement (the best is kept)")
+    parser.add_argument('--full', action='store_true',
+                        help=f"also run the per-pair paths above {PER_ITEM_LIMIT} items")
+    parser.add_argument('--word2vec', help="pickled Word2Vec model (defaults to a synthetic one)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline results file")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="slowdown over the baseline reported as a regression")
+    args = parser.parse_args()
+
+    if args.word2vec:
+        with open(args.word2vec, 'rb') as f:
+            word2vec_model = pickle.load(f)
+    else:
+        word2vec_model = train_word2vec(args.seed)
+
+    results = run(args.sizes, args.repeat, args.seed, word2vec_model, args.full)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"machine": platform.node(), "python": platform.python_version(),
+                       "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'), "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with the baseline from {baseline.get('created_at')} on {baseline.get('machine')}:")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
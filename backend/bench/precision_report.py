@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import pickle
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml'))
+from embeddings import PhraseEmbedder
+from mentor_store import MentorStore
+from vector_store import VectorStore, quantize
+from synthetic import generate_mentors, generate_student, train_word2vec
+from bench_ann import load_scorer
+
+# (word vector storage, phrase/mentor vector dtype); the first entry is the reference
+VARIANTS = [
+    ('float32', 'float64'),
+    ('float32', 'float32'),
+    ('float16', 'float16'),
+    ('int8', 'float32'),
+    ('int8', 'float16'),
+]
+
+def ranks(values):
+    order = np.argsort(values, kind='stable')
+    result = np.empty(len(values))
+    result[order] = np.arange(len(values))
+    return result
+
+def store_vector_bytes(store):
+    return (store.bio_vectors.nbytes + store.profile_vectors.nbytes
+            + store.skills.matrix.nbytes + store.interests.matrix.nbytes)
+
+def evaluate(wv, mentors, students, storage, dtype, score):
+    stored, scales = quantize(wv.vectors, storage)
+    vectors = VectorStore(list(wv.index_to_key), stored, scales)
+    store = MentorStore(PhraseEmbedder(vectors, dtype=dtype))
+    store.register(mentors)
+    slots = store.resolve()
+
+    scores = []
+    start = time.perf_counter()
+    for student in students:
+        scores.append(score(store.feature_matrix(student, slots)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "scores": scores,
+        "word_bytes": vectors.nbytes,
+        "store_bytes": store_vector_bytes(store),
+        "pairs_per_second": len(students) * len(mentors) / elapsed,
+    }
+
+def compare(reference, result, k):
+    same_score, top_overlap, rank_corr, max_diff = [], [], [], []
+    for ref, other in zip(reference["scores"], result["scores"]):
+        same_score.append(np.mean(ref == other))
+        top_ref = set(np.argsort(-ref, kind='stable')[:k].tolist())
+        top_other = set(np.argsort(-other, kind='stable')[:k].tolist())
+        top_overlap.append(len(top_ref & top_other) / k)
+        rank_corr.append(np.corrcoef(ranks(ref), ranks(other))[0, 1])
+        max_diff.append(np.max(np.abs(ref - other)))
+    return np.mean(same_score), np.mean(top_overlap), np.mean(rank_corr), np.max(max_diff)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare matchScores at full and reduced embedding precision")
+    parser.add_argument('--mentors', type=int, default=5000)
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--word2vec', help="pickled Word2Vec model (defaults to a synthetic one)")
+    parser.add_argument('--model', help="match model file (defaults to a freshly created one)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.word2vec:
+        with open(args.word2vec, 'rb') as f:
+            word2vec_model = pickle.load(f)
+    else:
+        word2vec_model = train_word2vec(args.seed)
+    wv = word2vec_model.wv
+    score = load_scorer(args.model)
+
+    mentors = generate_mentors(args.mentors, args.seed)
+    students = [generate_student(args.seed + 100 + i) for i in range(args.students)]
+
+    results = [evaluate(wv, mentors, students, storage, dtype, score) for storage, dtype in VARIANTS]
+    reference = results[0]
+
+    print(f"{args.students} students x {args.mentors} mentors, vocabulary {len(wv.index_to_key)} x {wv.vector_size}")
+    print(f"{'words':>8} {'vectors':>8} {'same score':>11} {'top-' + str(args.k):>7} {'rank corr':>10} "
+          f"{'max diff':>9} {'word MB':>8} {'store MB':>9} {'pairs/s':>11}")
+    for (storage, dtype), result in zip(VARIANTS, results):
+        same, overlap, corr, diff = compare(reference, result, args.k)
+        print(f"{storage:>8} {dtype:>8} {same:>11.4f} {overlap:>7.3f} {corr:>10.5f} {diff:>9.4f} "
+              f"{result['word_bytes'] / 2**20:>8.3f} {result['store_bytes'] / 2**20:>9.3f} "
+              f"{result['pairs_per_second']:>11.0f}")
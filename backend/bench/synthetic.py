@@ -0,0 +1,149 @@
+import random
+
+# Skills, interests and bio vocabulary per domain; earlier entries are more popular
+DOMAINS = {
+    "software": {
+        "industry": {"id": 1, "name": "Technology"},
+        "skills": ["JavaScript", "React", "Python", "Java", "Node.js", "TypeScript", "Spring Boot",
+                   "Microservices", "Docker", "Kubernetes", "AWS", "SQL", "Go", "GraphQL"],
+        "interests": ["Web Development", "Backend Development", "System Design", "Cloud Computing",
+                      "Open Source", "DevOps", "UI Design", "Mobile Development"],
+        "bio": ["software engineer building scalable web applications",
+                "backend developer focused on distributed systems and cloud infrastructure",
+                "frontend engineer who loves design systems and react",
+                "enterprise software architect specializing in scalable backend systems"],
+    },
+    "data": {
+        "industry": {"id": 2, "name": "Data Science"},
+        "skills": ["Python", "Machine Learning", "Data Analysis", "SQL", "TensorFlow", "PyTorch",
+                   "Statistics", "Deep Learning", "Pandas", "Spark", "Tableau", "NLP"],
+        "interests": ["Machine Learning", "Data Science", "Artificial Intelligence", "Data Visualization",
+                      "Research", "Big Data"],
+        "bio": ["data scientist applying machine learning to business problems",
+                "machine learning engineer deploying deep learning models",
+                "analyst turning data into insight with statistics and visualization",
+                "researcher in natural language processing and deep learning"],
+    },
+    "finance": {
+        "industry": {"id": 3, "name": "Finance"},
+        "skills": ["Financial Analysis", "Excel", "Accounting", "Risk Management", "Valuation",
+                   "Investment Banking", "Financial Modeling", "SQL"],
+        "interests": ["Investing", "FinTech", "Corporate Finance", "Financial Markets", "Startups"],
+        "bio": ["investment analyst with a focus on financial modeling and valuation",
+                "risk manager at a global bank",
+                "corporate finance lead who mentors graduates entering finance"],
+    },
+    "marketing": {
+        "industry": {"id": 4, "name": "Marketing"},
+        "skills": ["Digital Marketing", "SEO", "Content Strategy", "Social Media", "Branding",
+                   "Market Research", "Copywriting", "Google Analytics"],
+        "interests": ["Digital Marketing", "Branding", "Content Creation", "Startups", "Consumer Behavior"],
+        "bio": ["digital marketing strategist growing consumer brands",
+                "content and social media lead for technology startups",
+                "brand manager passionate about market research"],
+    },
+    "management": {
+        "industry": {"id": 5, "name": "Consulting"},
+        "skills": ["Project Management", "Agile", "Scrum", "Leadership", "Product Management",
+                   "Stakeholder Management", "Strategy", "Communication"],
+        "interests": ["Project Management", "Leadership", "Entrepreneurship", "Product Strategy", "Startups"],
+        "bio": ["project manager delivering agile transformations",
+                "product manager who has launched products from idea to scale",
+                "management consultant advising on strategy and leadership"],
+    },
+}
+LOCATIONS = ["Bangalore", "Mumbai", "Delhi", "Pune", "Hyderabad", "Chennai", "Remote"]
+LOCATION_WEIGHTS = [30, 20, 15, 12, 10, 8, 5]
+
+FEEDBACK_TEXTS = [
+    "The session was great and really useful",
+    "Amazing speaker, I learned a lot about python",
+    "Good content but the audio was poor",
+    "Terrible organisation, started an hour late",
+    "It was okay",
+    "Loved the networking part, best event this year",
+    "The workshop felt rushed and the slides were bad",
+    "Very relevant to my career goals",
+    "Not what I expected",
+    "",
+    "ok",
+]
+
+def _zipf_sample(rng, items, count):
+    """Sample distinct items with popularity falling off like 1/rank"""
+    weights = [1.0 / (rank + 1) for rank in range(len(items))]
+    chosen = []
+    pool = list(items)
+    while pool and len(chosen) < count:
+        item = rng.choices(pool, weights=weights[:len(pool)])[0]
+        index = pool.index(item)
+        pool.pop(index)
+        weights.pop(index)
+        chosen.append(item)
+    return chosen
+
+def _profile(rng, person_id, domain_name):
+    domain = DOMAINS[domain_name]
+    # Most people stay in their domain, some pick up a skill from another one
+    skills = _zipf_sample(rng, domain["skills"], rng.randint(1, 6))
+    if rng.random() < 0.3:
+        other = DOMAINS[rng.choice(list(DOMAINS))]
+        skills += _zipf_sample(rng, other["skills"], 1)
+    skills = list(dict.fromkeys(skills))
+    return {
+        "id": person_id,
+        "skills": [{"id": i, "name": name} for i, name in enumerate(skills)],
+        "interests": _zipf_sample(rng, domain["interests"], rng.randint(1, 4)),
+        "bio": rng.choice(domain["bio"]),
+        "location": rng.choices(LOCATIONS, weights=LOCATION_WEIGHTS)[0],
+        "industry": domain["industry"],
+    }
+
+def generate_student(seed=0):
+    rng = random.Random(seed)
+    student = _profile(rng, 1, rng.choice(list(DOMAINS)))
+    student.update({"name": "Synthetic Student", "role": "Student", "experienceYears": rng.randint(0, 3)})
+    return student
+
+def generate_mentors(count, seed=0):
+    rng = random.Random(seed + 1)
+    mentors = []
+    for i in range(count):
+        mentor = _profile(rng, 1000 + i, rng.choice(list(DOMAINS)))
+        mentor.update({
+            "name": f"Mentor {i}",
+            "role": "Alumni",
+            "experienceYears": rng.randint(2, 25),
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "totalMentees": int(rng.expovariate(1 / 8)),
+            "company": "Example Corp",
+            "position": "Engineer",
+            "availability": ["Weekday Evenings"],
+            "profileImage": "https://randomuser.me/api/portraits/lego/1.jpg",
+            "graduationYear": rng.randint(1995, 2020),
+        })
+        mentors.append(mentor)
+    return mentors
+
+def generate_texts(count, seed=0):
+    rng = random.Random(seed + 2)
+    return [rng.choice(FEEDBACK_TEXTS) for _ in range(count)]
+
+def train_word2vec(seed=0, vector_size=64):
+    """
+    Train a small Word2Vec model on the synthetic vocabulary.
+
+    The shipped trained_word2vec.pkl only has capitalized, quoted tokens, so
+    lowercased skills never hit its vocabulary; benchmarking the semantic paths
+    needs a model that does.
+    """
+    from gensim.models import Word2Vec
+
+    rng = random.Random(seed)
+    sentences = []
+    for domain in DOMAINS.values():
+        words = [word.lower() for phrase in domain["skills"] + domain["interests"] + domain["bio"]
+                 for word in phrase.split()]
+        for _ in range(200):
+            sentences.append(rng.sample(words, min(8, len(words))))
+    return Word2Vec(sentences, vector_size=vector_size, min_count=1, seed=seed, workers=1)
@@ -0,0 +1,107 @@
+import numpy as np
+
+def profile_vector(embedder, bio, skills, interests):
+    """
+    Unit vector summarising a profile: the normalized sum of the bio vector,
+    the mean skill vector and the mean interest vector. Returns None if none
+    of the parts has an embedding.
+    """
+    if embedder is None:
+        return None
+
+    total = np.zeros(embedder.wv.vector_size)
+    parts = [[bio]] if bio is not None else []
+    parts += [skills, interests]
+    for phrases in parts:
+        vectors = [v for v in (embedder.embed(phrase) for phrase in phrases) if v is not None]
+        if not vectors:
+            continue
+        mean = np.mean(vectors, axis=0)
+        norm = np.linalg.norm(mean)
+        if norm > 0:
+            total += mean / norm
+
+    norm = np.linalg.norm(total)
+    if norm == 0:
+        return None
+    return total / norm
+
+class IVFIndex:
+    """
+    Inverted-file index over unit profile vectors.
+
+    Vectors are partitioned by spherical k-means into about sqrt(n) lists. A
+    query ranks the centroids, gathers the members of the closest lists until
+    it has enough of them, and ranks only those members exactly.
+    """
+
+    def __init__(self, n_lists=None, iterations=10, sample_size=50000, seed=0):
+        self.n_lists = n_lists
+        self.iterations = iterations
+        self.sample_size = sample_size
+        self.seed = seed
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.intp)
+        self.trained_size = 0
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def train(self, vectors):
+        """Fit the centroids on `vectors` and assign every vector to a list"""
+        rng = np.random.default_rng(self.seed)
+        # Reduced-precision vectors are clustered in float32
+        vectors = np.asarray(vectors, dtype=np.promote_types(vectors.dtype, np.float32))
+        n = len(vectors)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+
+        sample = vectors
+        if n > self.sample_size:
+            sample = vectors[rng.choice(n, self.sample_size, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            # Lists that lost all their members keep their previous centroid
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+
+        self.centroids = centroids
+        self.assignments = self.assign(vectors)
+        self.trained_size = n
+
+    def assign(self, vectors):
+        """Nearest list of each vector"""
+        if len(vectors) == 0:
+            return np.zeros(0, dtype=np.intp)
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def update(self, slots, vectors):
+        """(Re)assign the vectors stored at `slots`, growing the assignment table if needed"""
+        slots = np.asarray(slots, dtype=np.intp)
+        if len(slots) == 0:
+            return
+        size = slots.max() + 1
+        if size > len(self.assignments):
+            grown = np.zeros(max(size, 2 * len(self.assignments)), dtype=np.intp)
+            grown[:len(self.assignments)] = self.assignments
+            self.assignments = grown
+        self.assignments[slots] = self.assign(vectors)
+
+    def probe(self, query, n, min_members, n_probe=1):
+        """
+        Rows (among the first `n`) in the lists closest to `query`.
+
+        At least `n_probe` lists are taken, and more are added in order of
+        centroid similarity until they hold `min_members` rows.
+        """
+        assignments = self.assignments[:n]
+        order = np.argsort(-(self.centroids @ query))
+        list_sizes = np.bincount(assignments, minlength=len(self.centroids))[order]
+        probes = max(n_probe, int(np.searchsorted(np.cumsum(list_sizes), min_members)) + 1)
+        return np.flatnonzero(np.isin(assignments, order[:probes]))
@@ -0,0 +1,182 @@
+import os
+import numpy as np
+from mentor_store import MentorStore
+from ranking import int_option, mentor_entry, number_option, parse_page, rank_mentors
+
+# Feature rows scored per model call when matching a cohort
+COHORT_BATCH_ROWS = int(os.environ.get('COHORT_BATCH_ROWS', 100000))
+
+# New mentees per mentor in one assignment unless the request or mentor says otherwise
+DEFAULT_CAPACITY = 1
+
+# Mentors listed per student when the request gives no top_k
+COHORT_TOP_K = 5
+
+def cohort_store(mentors, embedder=None):
+    """
+    A MentorStore of the mentors sent with a cohort request, so that each is
+    parsed and embedded once for the whole cohort rather than once per student
+    """
+    ids = [mentor.get('id') if isinstance(mentor, dict) else None for mentor in mentors]
+    if None in ids or len(set(ids)) != len(ids):
+        raise ValueError("Every mentor needs a unique id")
+    store = MentorStore(embedder)
+    store.register(mentors)
+    return store
+
+def cohort_scores(students, feature_fn, n_mentors, score_fn, batch_rows=COHORT_BATCH_ROWS):
+    """
+    The (n_students x n_mentors) match score matrix.
+
+    `feature_fn(student)` returns the student's feature matrix against every
+    mentor; the rows of several students are stacked so that the model is
+    called once per ~batch_rows pairs instead of once per student.
+    """
+    if not students or n_mentors == 0:
+        return np.zeros((len(students), n_mentors), dtype=int)
+
+    per_batch = max(1, batch_rows // n_mentors)
+    blocks = []
+    for start in range(0, len(students), per_batch):
+        block = students[start:start + per_batch]
+        features = np.vstack([feature_fn(student) for student in block])
+        blocks.append(np.asarray(score_fn(features)).reshape(len(block), n_mentors))
+    return np.vstack(blocks)
+
+def mentor_capacities(mentors, capacity=None, max_mentees=None):
+    """
+    Cohort students each mentor can take: the mentor's own "capacity", else
+    `capacity`, else DEFAULT_CAPACITY. With `max_mentees` it is also capped by
+    the room left once the mentor's totalMentees are counted. A mentor
+    capacity that is not a non-negative integer raises ValueError.
+    """
+    default = DEFAULT_CAPACITY if capacity is None else capacity
+    capacities = []
+    for mentor in mentors:
+        try:
+            capacities.append(int_option(mentor, 'capacity', default))
+        except ValueError as e:
+            raise ValueError(f"Mentor {mentor.get('id')!r}: {e}") from None
+    capacities = np.array(capacities, dtype=np.intp)
+    if max_mentees is not None:
+        load = np.array([mentor.get('totalMentees', 0) for mentor in mentors], dtype=float)
+        capacities = np.minimum(capacities, np.maximum(0, max_mentees - load).astype(np.intp))
+    return np.maximum(capacities, 0)
+
+def assignment_options(data, mentors):
+    """
+    The assign_cohort arguments of an "assign" request for these mentors,
+    from its "capacity", "maxMentees", "loadPenalty" and "minScore" options;
+    a bad value raises ValueError (a 400 for the endpoints)
+    """
+    capacity = int_option(data, 'capacity')
+    max_mentees = int_option(data, 'maxMentees')
+    return {
+        "capacities": mentor_capacities(mentors, capacity, max_mentees),
+        "load": [mentor.get('totalMentees', 0) for mentor in mentors],
+        "load_penalty": number_option(data, 'loadPenalty', 0.0, minimum=0),
+        "min_score": number_option(data, 'minScore'),
+    }
+
+def assign_cohort(scores, capacities, load=None, load_penalty=0.0, min_score=None):
+    """
+    Give every student at most one mentor, each mentor at most its capacity,
+    maximizing the total match score.
+
+    With `load_penalty`, a mentor's k-th new mentee (from 0) is worth
+    load_penalty * (load + k) less, so mentors who already have many mentees
+    (`load`, e.g. totalMentees) fill up last. Pairs scoring below `min_score`
+    are never assigned. Returns the mentor index of each student (-1 if none).
+
+    Solved exactly as a min-cost bipartite matching between students and
+    mentor slots. Each student only needs edges to its n_students best slots:
+    in any assignment the other students hold fewer of those, so one is free
+    for it, which keeps the graph at most n_students^2 edges.
+    """
+    # Imported here: scipy adds a noticeable share of startup time to every
+    # process that loads this module, and most never assign a cohort
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+    scores = np.asarray(scores, dtype=float)
+    n_students, n_mentors = scores.shape
+    assignment = np.full(n_students, -1, dtype=np.intp)
+    capacities = np.minimum(np.asarray(capacities, dtype=np.intp), n_students)
+    if n_students == 0 or capacities.sum() == 0:
+        return assignment
+
+    load = np.zeros(n_mentors) if load is None else np.asarray(load, dtype=float)
+    # Slots of each mentor, in order of their penalty
+    slot_mentor = np.repeat(np.arange(n_mentors), capacities)
+    slot_rank = np.arange(len(slot_mentor)) - np.repeat(np.cumsum(capacities) - capacities, capacities)
+    slot_penalty = load_penalty * (load[slot_mentor] + slot_rank)
+
+    rows, cols, values = [], [], []
+    keep = min(n_students, len(slot_mentor))
+    for student in range(n_students):
+        slot_values = scores[student, slot_mentor] - slot_penalty
+        if min_score is not None:
+            slot_values[scores[student, slot_mentor] < min_score] = -np.inf
+        best = np.argpartition(-slot_values, keep - 1)[:keep] if keep < len(slot_values) else np.arange(len(slot_values))
+        best = best[np.isfinite(slot_values[best])]
+        rows.append(np.full(len(best), student))
+        cols.append(best)
+        values.append(slot_values[best])
+    rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+    # Costs must be positive; every student also gets a private "unassigned"
+    # slot costing more than any chain of real edges could save
+    spread = (values.max() - values.min() + 1) if len(values) else 1
+    costs = values.max() - values + 1 if len(values) else values
+    dummy_cost = spread * (n_students + 1) + 1
+    n_slots = len(slot_mentor)
+    graph = csr_matrix((np.concatenate([costs, np.full(n_students, dummy_cost)]),
+                        (np.concatenate([rows, np.arange(n_students)]),
+                         np.concatenate([cols, n_slots + np.arange(n_students)]))),
+                       shape=(n_students, n_slots + n_students))
+
+    matched_rows, matched_cols = min_weight_full_bipartite_matching(graph)
+    real = matched_cols < n_slots
+    assignment[matched_rows[real]] = slot_mentor[matched_cols[real]]
+    return assignment
+
+def top_matches(students, mentors, scores, top_k=None, fields=None):
+    """The best `top_k` mentors of every student, as /api/predict entries"""
+    return [{"studentId": student.get('id'),
+             "mentors": rank_mentors(mentors, row, top_k=top_k, fields=fields)}
+            for student, row in zip(students, scores)]
+
+def assignment_result(students, mentors, scores, assignment, fields=None):
+    """Per-student assigned mentor (or None) plus per-mentor load and totals"""
+    matches = []
+    load = {}
+    total = 0
+    for student, row, mentor in zip(students, scores, assignment):
+        if mentor < 0:
+            matches.append({"studentId": student.get('id'), "mentor": None})
+            continue
+        entry = mentor_entry(mentors[mentor], row[mentor], fields)
+        matches.append({"studentId": student.get('id'), "mentor": entry})
+        load[mentors[mentor]['id']] = load.get(mentors[mentor]['id'], 0) + 1
+        total += int(row[mentor])
+    return {
+        "assignments": matches,
+        "assigned": len(matches) - int((assignment < 0).sum()),
+        "unassigned": int((assignment < 0).sum()),
+        "totalScore": total,
+        "load": [{"mentorId": mentor_id, "assigned": count} for mentor_id, count in load.items()]
+    }
+
+def cohort_response(data, students, mentors, scores):
+    """
+    The response to a cohort request: the top_k mentors of every student, or
+    with "assign" the capacity-limited assignment (see assignment_options)
+    """
+    page = parse_page(data)
+    if not data.get('assign'):
+        top_k = COHORT_TOP_K if page['top_k'] is None else page['top_k']
+        return {"students": top_matches(students, mentors, scores, top_k, page['fields']),
+                "totalMentors": len(mentors)}
+
+    assignment = assign_cohort(scores, **assignment_options(data, mentors))
+    return assignment_result(students, mentors, scores, assignment, page['fields'])
@@ -1,34 +1,50 @@
-import pickle
+import os
+import sys
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from features import FEATURE_NAMES
+from model_bundle import make_bundle, save_bundle
+from forest import export_bundle
 
-# Create a simple model for mentor matching
-def create_model():
+# Where predict.py looks for the match model
+MODEL_PATH = os.path.join(os.path.dirname(__file__), '../../src/ml_model.pkl')
+
+# Create a simple bootstrap model for mentor matching; train.py fits the
+# real one on historical student-mentor pairs
+def create_model(model_path=MODEL_PATH):
     # Create a random forest regressor
     model = RandomForestRegressor(n_estimators=100, random_state=42)
-    
+
     # Create some sample training data
-    # Features: [skills_match, industry_match, interests_match, location_match, 
-    #            experience_diff, mentor_rating, mentor_mentees]
+    # Features: [skills_match, industry_match, interests_match, location_match,
+    #            experience_diff, mentor_rating, mentor_mentees, bio_similarity]
     X = np.array([
-        [3, 1, 2, 1, 2, 4.8, 12],  # High match
-        [2, 1, 1, 1, 3, 4.5, 8],   # Medium-high match
-        [1, 1, 1, 0, 5, 4.2, 5],   # Medium match
-        [1, 0, 1, 0, 8, 3.9, 3],   # Low-medium match
-        [0, 0, 0, 0, 10, 3.5, 1],  # Low match
+        [3, 1, 2, 1, 2, 4.8, 12, 0.8],  # High match
+        [2, 1, 1, 1, 3, 4.5, 8, 0.6],   # Medium-high match
+        [1, 1, 1, 0, 5, 4.2, 5, 0.5],   # Medium match
+        [1, 0, 1, 0, 8, 3.9, 3, 0.3],   # Low-medium match
+        [0, 0, 0, 0, 10, 3.5, 1, 0.1],  # Low match
     ])
-    
+
     # Target scores (0-1 range, will be scaled to 0-100 in the prediction script)
     y = np.array([0.9, 0.75, 0.6, 0.4, 0.2])
-    
+
+    # Fit the scaler once on the training data; predict.py reuses it as-is
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
     # Train the model
-    model.fit(X, y)
-    
-    # Save the model to a pickle file
-    with open('model.pkl', 'wb') as f:
-        pickle.dump(model, f)
-    
-    print("Model created and saved as model.pkl")
+    model.fit(X_scaled, y)
+
+    # Save the model, its scaler and the feature layout as one versioned bundle
+    bundle = make_bundle(model, scaler, FEATURE_NAMES)
+    save_bundle(bundle, model_path)
+
+    print(f"Model version {bundle['version']} created and saved as {model_path}")
+
+    # Compiled copy for serving without sklearn
+    print(f"Compiled forest saved as {export_bundle(bundle, model_path)}")
 
 if __name__ == "__main__":
-    create_model()
+    create_model(sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH)
@@ -0,0 +1,146 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Maximum number of phrases kept in each embedding cache
+DEFAULT_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', 10000))
+
+# Precision of cached phrase vectors and of the mentor-side vectors derived
+# from them; float16 halves memory again relative to float32
+DEFAULT_DTYPE = os.environ.get('EMBEDDING_DTYPE', 'float64')
+
+# Unit vectors need a float type; integer types would round them to zeros
+EMBEDDING_DTYPES = ('float16', 'float32', 'float64')
+
+def check_dtype(dtype):
+    """The numpy dtype for an embedding precision name, or ValueError if it is not a float type"""
+    try:
+        name = np.dtype(dtype).name
+    except TypeError:
+        name = None
+    if name not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype {dtype!r}; use one of {', '.join(EMBEDDING_DTYPES)}")
+    return np.dtype(dtype)
+
+# Fail at startup rather than silently zero every similarity
+check_dtype(DEFAULT_DTYPE)
+
+def normalize_phrase(text):
+    """Lowercase and collapse whitespace so equivalent phrases share a cache entry"""
+    return ' '.join(text.lower().split())
+
+class PhraseEmbedder:
+    """
+    Bounded LRU cache of normalized phrase -> unit-normalized mean Word2Vec vector.
+
+    Skill, interest and bio strings repeat across mentors and requests, so each
+    distinct phrase is tokenized, looked up and averaged only once. Phrases with
+    no in-vocabulary words are cached as None.
+
+    Vectors are kept in `dtype`; matrices handed to callers for products are
+    at least float32 so that reduced storage precision does not push the
+    arithmetic off the BLAS path.
+    """
+
+    def __init__(self, word_vectors, max_size=DEFAULT_CACHE_SIZE, dtype=DEFAULT_DTYPE):
+        self.wv = word_vectors
+        self.max_size = max_size
+        self.dtype = check_dtype(dtype)
+        self.compute_dtype = np.promote_types(self.dtype, np.float32)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.oov_words = 0
+        self.oov_phrases = 0
+
+    def embed(self, text):
+        """Return the unit mean vector of the phrase, or None if no word is in the vocabulary"""
+        key = normalize_phrase(text)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+            self.misses += 1
+
+        vector = self._compute(key)
+
+        with self.lock:
+            self.cache[key] = vector
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+        return vector
+
+    def _compute(self, phrase):
+        tokens = phrase.split()
+        words = [word for word in tokens if word in self.wv.key_to_index]
+        if len(words) < len(tokens) or not words:
+            with self.lock:
+                self.oov_words += len(tokens) - len(words)
+                self.oov_phrases += not words
+        if not words:
+            return None
+
+        vector = np.asarray(self.wv[words], dtype=np.float64).mean(axis=0)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        vector = (vector / norm).astype(self.dtype)
+        vector.setflags(write=False)
+        return vector
+
+    def embed_matrix(self, texts):
+        """Stack the unit vectors of many phrases; phrases without a vector get a zero row"""
+        matrix = np.zeros((len(texts), self.wv.vector_size), dtype=self.compute_dtype)
+        for row, text in enumerate(texts):
+            vector = self.embed(text)
+            if vector is not None:
+                matrix[row] = vector
+        return matrix
+
+    def similarity(self, text1, text2):
+        """Cosine similarity of the two phrases' mean vectors, clipped at 0"""
+        vec1 = self.embed(text1)
+        vec2 = self.embed(text2)
+        if vec1 is None or vec2 is None:
+            return 0
+        return max(0.0, float(np.dot(vec1, vec2)))
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.cache),
+                "maxSize": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "oovWords": self.oov_words,
+                "oovPhrases": self.oov_phrases
+            }
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.hits = 0
+            self.misses = 0
+            self.oov_words = 0
+            self.oov_phrases = 0
+
+_embedders = {}
+_embedders_lock = threading.Lock()
+
+def get_embedder(word2vec_model, max_size=DEFAULT_CACHE_SIZE, dtype=DEFAULT_DTYPE):
+    """Return the process-wide PhraseEmbedder for a loaded Word2Vec model or vector store"""
+    if word2vec_model is None:
+        return None
+    wv = getattr(word2vec_model, 'wv', word2vec_model)
+    with _embedders_lock:
+        embedder = _embedders.get(id(word2vec_model))
+        if embedder is None or embedder.wv is not wv:
+            embedder = PhraseEmbedder(wv, max_size, dtype)
+            _embedders[id(word2vec_model)] = embedder
+        return embedder
@@ -0,0 +1,138 @@
+import numpy as np
+from metrics import stage
+
+# Column order of the student-mentor feature matrix
+FEATURE_NAMES = [
+    'skills_match',
+    'industry_match',
+    'interests_match',
+    'location_match',
+    'experience_diff',
+    'mentor_rating',
+    'mentor_mentees',
+    'bio_similarity',
+]
+NUM_FEATURES = len(FEATURE_NAMES)
+
+def list_match_scores(student_items, mentor_item_lists, embedder=None):
+    """
+    Exact overlap plus semantic best-match of one student list against many mentor lists.
+
+    For each mentor this equals the number of shared items plus, for every
+    student item the mentor does not have, its best cosine similarity to any of
+    the mentor's items. All similarities come from one matrix product between
+    the student's phrase embeddings and the embeddings of every distinct mentor
+    phrase, followed by a segmented row-wise max per mentor.
+    """
+    lengths = np.array([len(items) for items in mentor_item_lists], dtype=np.intp)
+
+    # Give every distinct mentor phrase an id so it is embedded once
+    phrase_ids = {}
+    flat_ids = np.array(
+        [phrase_ids.setdefault(item, len(phrase_ids)) for items in mentor_item_lists for item in items],
+        dtype=np.intp
+    )
+    phrase_matrix = embedder.embed_matrix(list(phrase_ids)) if embedder is not None else None
+
+    return match_scores_from_ids(student_items, flat_ids, lengths, phrase_ids, phrase_matrix, embedder)
+
+def match_scores_from_ids(student_items, flat_ids, lengths, phrase_ids, phrase_matrix=None, embedder=None):
+    """
+    list_match_scores over mentor lists that are already encoded as phrase ids.
+
+    `flat_ids` holds every mentor's phrase ids back to back, `lengths` the
+    number of ids per mentor, `phrase_ids` maps phrase -> id and row `id` of
+    `phrase_matrix` is that phrase's unit vector (zero if it has none).
+    """
+    n_mentors = len(lengths)
+    owners = np.repeat(np.arange(n_mentors), lengths)
+
+    # The semantic sum runs over the student list, so repeated items count repeatedly
+    unique_student = list(dict.fromkeys(student_items))
+    multiplicity = np.array([student_items.count(item) for item in unique_student], dtype=float)
+
+    # contains[i, j]: mentor j has student item i (a direct match)
+    contains = np.zeros((len(unique_student), n_mentors), dtype=bool)
+    for row, item in enumerate(unique_student):
+        phrase_id = phrase_ids.get(item)
+        if phrase_id is not None:
+            contains[row, owners[flat_ids == phrase_id]] = True
+
+    scores = contains.sum(axis=0).astype(float)
+    if embedder is None or phrase_matrix is None or not unique_student or len(flat_ids) == 0:
+        return scores
+
+    # Only the phrases these mentors use take part in the product
+    used_ids, positions = np.unique(flat_ids, return_inverse=True)
+    student_matrix = embedder.embed_matrix(unique_student)
+    similarities = np.maximum(student_matrix @ phrase_matrix[used_ids].T, 0)[:, positions]
+
+    # Best similarity per (student item, mentor) over that mentor's segment
+    best = np.zeros((len(unique_student), n_mentors))
+    has_items = lengths > 0
+    starts = np.cumsum(lengths) - lengths
+    best[:, has_items] = np.maximum.reduceat(similarities, starts[has_items], axis=1)
+    best[contains] = 0  # Already directly matched
+
+    return scores + multiplicity @ best
+
+def text_similarity_scores(text, other_texts, embedder=None):
+    """Similarity of one text against many; None entries score 0"""
+    scores = np.zeros(len(other_texts))
+    if embedder is None or text is None:
+        return scores
+
+    present = [i for i, other in enumerate(other_texts) if other is not None]
+    if not present:
+        return scores
+
+    vector = embedder.embed_matrix([text])[0]
+    others = embedder.embed_matrix([other_texts[i] for i in present])
+    scores[present] = np.maximum(others @ vector, 0)
+    return scores
+
+def numeric_column(mentors, field, columns=None):
+    """One numeric field of every mentor (0 where missing), from `columns` when it has it"""
+    if columns is not None and field in columns:
+        return np.asarray(columns[field], dtype=float)
+    return np.array([mentor.get(field, 0) for mentor in mentors], dtype=float)
+
+def build_feature_matrix(student, mentors, embedder=None, columns=None):
+    """
+    Build the (n_mentors x NUM_FEATURES) feature matrix for one student against many mentors.
+
+    Missing fields fall back to the same defaults as create_feature_vector in
+    server.py. Without an embedder the semantic parts contribute 0. `columns`
+    holds numeric mentor fields as arrays (see wire.mentor_columns), used
+    instead of reading them from each mentor.
+    """
+    features = np.zeros((len(mentors), NUM_FEATURES))
+    if not mentors:
+        return features
+
+    student_skills = [skill['name'].lower() for skill in student.get('skills', [])]
+    mentor_skills = [[skill['name'].lower() for skill in mentor.get('skills', [])] for mentor in mentors]
+    with stage('semantic_similarity'):
+        features[:, 0] = list_match_scores(student_skills, mentor_skills, embedder)
+
+    student_industry = student.get('industry', {}).get('id')
+    features[:, 1] = [mentor.get('industry', {}).get('id') == student_industry for mentor in mentors]
+
+    student_interests = [interest.lower() for interest in student.get('interests', [])]
+    mentor_interests = [[interest.lower() for interest in mentor.get('interests', [])] for mentor in mentors]
+    with stage('semantic_similarity'):
+        features[:, 2] = list_match_scores(student_interests, mentor_interests, embedder)
+
+    features[:, 3] = [mentor.get('location') == student.get('location') for mentor in mentors]
+
+    experience = numeric_column(mentors, 'experienceYears', columns)
+    features[:, 4] = np.abs(student.get('experienceYears', 0) - experience)
+    features[:, 5] = numeric_column(mentors, 'rating', columns)
+    features[:, 6] = numeric_column(mentors, 'totalMentees', columns)
+
+    with stage('semantic_similarity'):
+        features[:, 7] = text_similarity_scores(
+            student.get('bio'), [mentor.get('bio') for mentor in mentors], embedder
+        )
+
+    return features
@@ -0,0 +1,101 @@
+import math
+import threading
+
+# Numeric feedback fields aggregated per event
+METRICS = ['rating', 'eventExperience', 'speakerInteraction', 'sessionRelevance']
+
+def event_key(event_id):
+    """Events are keyed by the string form of their id, so 5 and "5" are the same event"""
+    return None if event_id is None else str(event_id)
+
+def metric_value(value):
+    """A feedback metric as a float, or None if it is not a finite number"""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+class FeedbackAggregates:
+    """
+    Running per-event totals of the feedback metrics.
+
+    Each record updates a count, sum, sum of squares and value histogram per
+    metric (and a sentiment tally when the record carries one) in constant
+    time, so reading the statistics never touches the stored records.
+    Values that are not finite numbers (e.g. "nan") are left out.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = {}
+
+    def add(self, feedback):
+        key = event_key(feedback.get('eventId'))
+        with self.lock:
+            event = self.events.get(key)
+            if event is None:
+                event = {
+                    "eventName": feedback.get('eventName'),
+                    "count": 0,
+                    "metrics": {metric: {"count": 0, "sum": 0.0, "sumSquares": 0.0, "histogram": {}}
+                                for metric in METRICS},
+                    "sentiment": {}
+                }
+                self.events[key] = event
+
+            event["count"] += 1
+            for metric in METRICS:
+                value = metric_value(feedback.get(metric))
+                if value is None:
+                    continue
+                totals = event["metrics"][metric]
+                totals["count"] += 1
+                totals["sum"] += value
+                totals["sumSquares"] += value * value
+                bucket = str(int(value)) if value.is_integer() else str(value)
+                totals["histogram"][bucket] = totals["histogram"].get(bucket, 0) + 1
+
+            sentiment = feedback.get('sentiment')
+            if sentiment:
+                event["sentiment"][sentiment] = event["sentiment"].get(sentiment, 0) + 1
+
+    def rebuild(self, records):
+        """Recompute every aggregate from the stored records"""
+        with self.lock:
+            self.events = {}
+        for feedback in records:
+            self.add(feedback)
+
+    def summary(self, event_id=None):
+        """Per-event statistics with mean and standard deviation derived from the totals"""
+        with self.lock:
+            ids = [event_key(event_id)] if event_id is not None else list(self.events)
+            result = []
+            for key in ids:
+                event = self.events.get(key)
+                if event is None:
+                    continue
+                metrics = {}
+                for metric, totals in event["metrics"].items():
+                    n = totals["count"]
+                    mean = totals["sum"] / n if n else None
+                    variance = max(0.0, totals["sumSquares"] / n - mean * mean) if n else None
+                    metrics[metric] = {
+                        "count": n,
+                        "sum": totals["sum"],
+                        "sumSquares": totals["sumSquares"],
+                        "mean": mean,
+                        "std": math.sqrt(variance) if n else None,
+                        "histogram": dict(totals["histogram"])
+                    }
+                result.append({
+                    "eventId": key,
+                    "eventName": event["eventName"],
+                    "count": event["count"],
+                    "metrics": metrics,
+                    "sentiment": dict(event["sentiment"])
+                })
+            return result
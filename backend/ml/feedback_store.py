@@ -0,0 +1,108 @@
+import os
+import json
+import sqlite3
+import threading
+
+# Largest page GET /api/feedback hands out
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(created_at, seq):
+    return f"{created_at}|{seq}"
+
+def decode_cursor(cursor):
+    created_at, _, seq = cursor.rpartition('|')
+    if not created_at or not seq.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, int(seq)
+
+class FeedbackStore:
+    """
+    Durable feedback records in SQLite (WAL).
+
+    Records are kept as JSON with eventId and createdAt in indexed columns.
+    Pages are ordered by (createdAt, insertion sequence) and continue from a
+    cursor, so every read is an index range scan that stops after `limit`
+    rows no matter how much feedback has been stored.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # With WAL a commit only appends to the log; NORMAL skips the fsync per commit
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS feedback ("
+                        "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                        "id TEXT UNIQUE NOT NULL, "
+                        "event_id TEXT, "
+                        "created_at TEXT NOT NULL, "
+                        "data TEXT NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS feedback_event ON feedback (event_id, created_at, seq)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS feedback_created ON feedback (created_at, seq)")
+        self.db.commit()
+
+    def add(self, feedback):
+        with self.lock:
+            self.db.execute("INSERT INTO feedback (id, event_id, created_at, data) VALUES (?, ?, ?, ?)",
+                            (feedback['id'], feedback.get('eventId'), feedback['createdAt'], json.dumps(feedback)))
+            self.db.commit()
+
+    def query(self, event_id=None, since=None, until=None, cursor=None, limit=None):
+        """
+        Feedback matching the filters, oldest first.
+
+        `since` is inclusive and `until` exclusive (ISO timestamps). Returns
+        (records, next cursor); the cursor is None once the last page is read.
+        """
+        conditions, params = [], []
+        if event_id is not None:
+            conditions.append("event_id = ?")
+            params.append(event_id)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(until)
+        if cursor is not None:
+            created_at, seq = decode_cursor(cursor)
+            conditions.append("(created_at, seq) > (?, ?)")
+            params.extend([created_at, seq])
+
+        sql = "SELECT seq, created_at, data FROM feedback"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at, seq"
+        if limit is not None:
+            # One extra row tells whether another page follows
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+        return [json.loads(data) for _, _, data in rows], next_cursor
+
+    def iter_all(self, batch_size=1000):
+        """Every record in insertion order, read in batches"""
+        last = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute("SELECT seq, data FROM feedback WHERE seq > ? ORDER BY seq LIMIT ?",
+                                       (last, batch_size)).fetchall()
+            if not rows:
+                return
+            for _, data in rows:
+                yield json.loads(data)
+            last = rows[-1][0]
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+# sklearn marks leaves with child index -1
+LEAF = -1
+
+# (sample, tree) pairs evaluated together by ForestEvaluator.predict
+PAIRS_PER_CHUNK = 32768
+
+def export_forest(model):
+    """
+    Flatten a fitted RandomForestRegressor (or a single DecisionTreeRegressor)
+    into packed arrays; child indices are global across all trees.
+    """
+    trees = [estimator.tree_ for estimator in getattr(model, 'estimators_', [model])]
+
+    features, thresholds, lefts, rights, values, roots, depths = [], [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        is_leaf = left == LEAF
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        # Leaves point at themselves so traversal can run a fixed number of steps
+        own = np.arange(tree.node_count, dtype=np.int32) + offset
+        lefts.append(np.where(is_leaf, own, left + offset))
+        rights.append(np.where(is_leaf, own, right + offset))
+        values.append(tree.value[:, 0, 0].astype(np.float64))
+        roots.append(offset)
+        depths.append(tree.max_depth)
+        offset += tree.node_count
+
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": np.int64(max(depths)),
+        "average": np.bool_(hasattr(model, 'estimators_')),
+    }
+
+class ForestEvaluator:
+    """
+    Batch evaluator for a forest exported by export_forest.
+
+    All (sample, tree) pairs step down one level at a time with array
+    operations; pairs that reached a leaf drop out of the working set. Inputs are compared as float32 and the per-tree outputs are
+    summed in tree order before averaging, exactly as sklearn does, so the
+    predictions are bit-identical to model.predict.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+        # Interleaved (right, left) so 2 * node + "goes left" picks the child
+        self.children = np.stack([self.right, self.left], axis=1).ravel()
+        self.leaf_mask = (self.left == np.arange(len(self.left))).view(np.int8)
+        self.average = bool(arrays['average'])
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        # Step through large batches in slices so the working arrays stay in cache
+        rows = max(1, PAIRS_PER_CHUNK // len(self.roots))
+        if len(X) <= rows:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[start:start + rows])
+                               for start in range(0, len(X), rows)])
+
+    def _predict_chunk(self, X):
+        n_samples, n_features = X.shape
+        n_trees = len(self.roots)
+        flat_X = X.ravel()
+
+        # One entry per (tree, sample) pair, tree-major so each tree's nodes stay
+        # cache-resident; only pairs not yet at a leaf are stepped
+        nodes = np.repeat(self.roots, n_samples)
+        base = np.tile(np.arange(n_samples, dtype=self.roots.dtype) * n_features, n_trees)
+        active = np.arange(len(nodes), dtype=self.roots.dtype)
+        current = nodes
+        for _ in range(self.max_depth):
+            internal = self.leaf_mask[current] == 0
+            active, current = active[internal], current[internal]
+            if len(active) == 0:
+                break
+            go_left = flat_X[base[active] + self.feature[current]] <= self.threshold[current]
+            current = self.children[2 * current + go_left]
+            nodes[active] = current
+
+        leaf_values = self.value[nodes].reshape(n_trees, n_samples)
+        total = np.zeros(n_samples)
+        for tree in range(n_trees):
+            total += leaf_values[tree]
+        if self.average:
+            total /= n_trees
+        return total
+
+class ArrayScaler:
+    """StandardScaler.transform from saved mean/scale arrays"""
+
+    def __init__(self, mean=None, scale=None):
+        self.mean = mean
+        self.scale = scale
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        return X
+
+def compiled_path(model_path):
+    return os.path.splitext(model_path)[0] + '.npz'
+
+def _source_identity(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+def export_bundle(bundle, model_path, out_path=None):
+    """Write the compiled form of a model bundle (forest arrays plus scaler) next to it"""
+    out_path = out_path or compiled_path(model_path)
+    arrays = {"forest_" + name: value for name, value in export_forest(bundle['model']).items()}
+    scaler = bundle.get('scaler')
+    if scaler is not None:
+        if getattr(scaler, 'mean_', None) is not None:
+            arrays['scaler_mean'] = scaler.mean_
+        if getattr(scaler, 'scale_', None) is not None:
+            arrays['scaler_scale'] = scaler.scale_
+    meta = {
+        "version": bundle['version'],
+        "feature_names": bundle.get('feature_names'),
+        "source": _source_identity(model_path),
+    }
+    with open(out_path, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+    return out_path
+
+def load_compiled(model_path, out_path=None):
+    """
+    Load the compiled bundle for `model_path`, or None if it is missing or
+    was exported from a different version of the model file.
+    """
+    out_path = out_path or compiled_path(model_path)
+    if not os.path.exists(out_path):
+        return None
+    with np.load(out_path) as data:
+        meta = json.loads(str(data['meta']))
+        if os.path.exists(model_path) and meta['source'] != _source_identity(model_path):
+            return None
+        forest = {name[len('forest_'):]: data[name] for name in data.files if name.startswith('forest_')}
+        mean = data['scaler_mean'] if 'scaler_mean' in data.files else None
+        scale = data['scaler_scale'] if 'scaler_scale' in data.files else None
+
+    has_scaler = mean is not None or scale is not None
+    return {
+        "format": 1,
+        "version": meta['version'],
+        "model": ForestEvaluator(forest),
+        "scaler": ArrayScaler(mean, scale) if has_scaler else None,
+        "feature_names": meta['feature_names'],
+        "metrics": {},
+    }
+
+if __name__ == "__main__":
+    from model_bundle import load_bundle
+
+    parser = argparse.ArgumentParser(description="Compile a match model bundle into packed NumPy arrays")
+    parser.add_argument('--model', default=os.path.join(os.path.dirname(__file__), '../../src/ml_model.pkl'))
+    parser.add_argument('--out', help="output file (defaults to the model path with .npz)")
+    args = parser.parse_args()
+
+    bundle = load_bundle(args.model)
+    if not hasattr(bundle['model'], 'estimators_') and not hasattr(bundle['model'], 'tree_'):
+        print(f"Cannot compile a {type(bundle['model']).__name__}; only tree models are supported")
+        sys.exit(1)
+    out_path = export_bundle(bundle, args.model, args.out)
+    print(f"Compiled model version {bundle['version']} to {out_path}")
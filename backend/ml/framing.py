@@ -0,0 +1,141 @@
+import os
+import sys
+import struct
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from metrics import stage
+from wire import decode, encode, msgpack, payload_format, supported_formats
+
+# Every frame is a 4-byte big-endian payload length followed by the payload
+HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+def read_exact(stream, size):
+    """Read exactly `size` bytes, or return None if the stream ends first"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+def read_frame(stream):
+    """Read one length-prefixed frame; returns None on a clean end of stream"""
+    header = read_exact(stream, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+    payload = read_exact(stream, length)
+    if payload is None:
+        raise EOFError("Stream ended in the middle of a frame")
+    return payload
+
+def write_frame(stream, payload):
+    """Write one length-prefixed frame and flush it"""
+    stream.write(HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+def encode_message(message, fmt='json'):
+    return encode(message, fmt)
+
+def decode_message(payload, fmt='json'):
+    return decode(payload, fmt)
+
+def serve_stream(reader, writer, handler, executor):
+    """
+    Serve framed requests from `reader` until it is closed.
+
+    Each request is a JSON object or a MessagePack map (see wire.py) with an
+    optional "id", answered in the same format. Requests are handed to
+    `executor` as soon as they are read, so a client can pipeline many requests
+    without waiting; responses carry the request id and may arrive out of order.
+    {"op": "formats"} lists the formats this worker can read.
+    """
+    write_lock = threading.Lock()
+    pending = []
+
+    def respond(request_id, response, fmt='json'):
+        response['id'] = request_id
+        with stage('serialization'):
+            payload = encode_message(response, fmt)
+        with write_lock:
+            write_frame(writer, payload)
+
+    def run(request_id, message, fmt):
+        try:
+            response = handler(message)
+        except Exception as e:
+            print(f"Error handling request {request_id}: {e}", file=sys.stderr)
+            response = {'error': str(e)}
+        try:
+            respond(request_id, response, fmt)
+        except (BrokenPipeError, ValueError, OSError) as e:
+            print(f"Could not send response {request_id}: {e}", file=sys.stderr)
+
+    while True:
+        payload = read_frame(reader)
+        if payload is None:
+            break
+        fmt = payload_format(payload)
+        if fmt == 'msgpack' and msgpack is None:
+            respond(None, {'error': "Invalid request: MessagePack frames need the msgpack package"})
+            continue
+        try:
+            with stage('parse'):
+                message = decode_message(payload, fmt)
+        except ValueError as e:
+            respond(None, {'error': f"Invalid request: {e}"}, fmt)
+            continue
+        request_id = message.pop('id', None) if isinstance(message, dict) else None
+        if message == {'op': 'ping'}:
+            respond(request_id, {'ok': True}, fmt)
+            continue
+        if message == {'op': 'formats'}:
+            respond(request_id, {'formats': supported_formats()}, fmt)
+            continue
+        pending.append(executor.submit(run, request_id, message, fmt))
+        pending = [future for future in pending if not future.done()]
+
+    # Let in-flight requests finish before the caller closes the writer
+    for future in pending:
+        future.result()
+
+def serve_stdio(handler, max_workers=4):
+    """Serve framed requests on stdin/stdout until stdin is closed"""
+    reader = sys.stdin.buffer
+    writer = sys.stdout.buffer
+    # Stray prints must not end up in the middle of the frame stream
+    sys.stdout = sys.stderr
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        serve_stream(reader, writer, handler, executor)
+
+def serve_unix_socket(path, handler, max_workers=4):
+    """Serve framed requests on a Unix domain socket, one thread per connection"""
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    class FrameHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                serve_stream(self.rfile, self.wfile, handler, executor)
+            except (EOFError, ValueError, OSError) as e:
+                print(f"Closing connection: {e}", file=sys.stderr)
+
+    if os.path.exists(path):
+        os.unlink(path)
+
+    server = socketserver.ThreadingUnixStreamServer(path, FrameHandler)
+    server.daemon_threads = True
+    print(f"Listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        executor.shutdown(wait=False)
+        if os.path.exists(path):
+            os.unlink(path)
@@ -0,0 +1,325 @@
+import threading
+import numpy as np
+from features import NUM_FEATURES, match_scores_from_ids
+from ann_index import IVFIndex, profile_vector
+from score_cache import profile_fingerprint
+
+def _grow(array, capacity, fill=0):
+    """Return `array` extended along its first axis to `capacity` rows"""
+    grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+class PhraseLists:
+    """
+    Variable-length phrase lists (skills or interests), one per store slot.
+
+    Each distinct phrase is embedded once into `matrix`; the lists themselves
+    are kept as phrase ids and flattened into one CSR-style array on demand.
+    """
+
+    def __init__(self, embedder=None):
+        self.embedder = embedder
+        self.phrase_ids = {}
+        dim = embedder.wv.vector_size if embedder is not None else 0
+        dtype = embedder.dtype if embedder is not None else np.float64
+        self.matrix = np.zeros((64, dim), dtype=dtype)
+        self.lists = []
+        self.flat = None
+        self.offsets = None
+
+    def set(self, slot, phrases):
+        ids = []
+        for phrase in phrases:
+            phrase_id = self.phrase_ids.get(phrase)
+            if phrase_id is None:
+                phrase_id = len(self.phrase_ids)
+                self.phrase_ids[phrase] = phrase_id
+                if phrase_id >= len(self.matrix):
+                    self.matrix = _grow(self.matrix, 2 * len(self.matrix))
+                if self.embedder is not None:
+                    vector = self.embedder.embed(phrase)
+                    if vector is not None:
+                        self.matrix[phrase_id] = vector
+            ids.append(phrase_id)
+
+        if slot == len(self.lists):
+            self.lists.append(np.array(ids, dtype=np.intp))
+        else:
+            self.lists[slot] = np.array(ids, dtype=np.intp)
+        self.flat = None
+
+    def gather(self, slots):
+        """Return (flat_ids, lengths) of the lists at `slots`, in that order"""
+        if self.flat is None:
+            lengths = np.array([len(ids) for ids in self.lists], dtype=np.intp)
+            self.offsets = np.concatenate([[0], np.cumsum(lengths)])
+            self.flat = np.concatenate(self.lists) if self.lists else np.zeros(0, dtype=np.intp)
+
+        starts = self.offsets[slots]
+        lengths = self.offsets[slots + 1] - starts
+        segment_starts = np.cumsum(lengths) - lengths
+        positions = np.arange(lengths.sum()) - np.repeat(segment_starts - starts, lengths)
+        return self.flat[positions], lengths
+
+class MentorStore:
+    """
+    Registered mentor profiles with every mentor-side matching input precomputed.
+
+    Numeric fields, industry/location codes and bio vectors live in contiguous
+    NumPy arrays indexed by slot; skill and interest lists are stored as phrase
+    ids with one embedding per distinct phrase. Scoring a student against the
+    store then needs no per-mentor parsing or embedding work.
+    """
+
+    def __init__(self, embedder=None, capacity=256):
+        self.embedder = embedder
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.profiles = []
+        # Feature-field hashes of each profile, for the pair-score cache
+        self.fingerprints = []
+        self.dim = embedder.wv.vector_size if embedder is not None else 0
+
+        self.experience = np.zeros(capacity)
+        self.rating = np.zeros(capacity)
+        self.mentees = np.zeros(capacity)
+        self.industry_codes = np.zeros(capacity, dtype=np.int64)
+        self.location_codes = np.zeros(capacity, dtype=np.int64)
+        # Vector columns are stored at the embedder's precision
+        dtype = embedder.dtype if embedder is not None else np.float64
+        self.bio_vectors = np.zeros((capacity, self.dim), dtype=dtype)
+        self.profile_vectors = np.zeros((capacity, self.dim), dtype=dtype)
+        self.index = IVFIndex()
+        self.prior_order = None
+        self.industry_index = {}
+        self.location_index = {}
+        self.skills = PhraseLists(embedder)
+        self.interests = PhraseLists(embedder)
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def register(self, mentors):
+        """
+        Add new mentors or replace the stored profile of known ones (matched by id).
+
+        Every mentor is parsed before any slot is touched, so a malformed one
+        raises ValueError and leaves the store as it was.
+        """
+        parsed = [self._parse(mentor) for mentor in mentors]
+        with self.lock:
+            encoded = []
+            for mentor, fields in zip(mentors, parsed):
+                slot = self.slots.get(mentor['id'])
+                if slot is None:
+                    slot = len(self.profiles)
+                    self._reserve(slot + 1)
+                    self.slots[mentor['id']] = slot
+                    self.profiles.append(mentor)
+                    self.fingerprints.append(None)
+                else:
+                    self.profiles[slot] = mentor
+                self._store(slot, fields)
+                encoded.append(slot)
+            
+            self.prior_order = None
+            # Keep an already trained ANN index current without retraining it
+            if self.index.trained:
+                self.index.update(encoded, self.profile_vectors[encoded])
+            return len(self.profiles)
+
+    def _reserve(self, size):
+        capacity = len(self.experience)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name in ('experience', 'rating', 'mentees', 'industry_codes', 'location_codes', 'bio_vectors',
+                     'profile_vectors'):
+            setattr(self, name, _grow(getattr(self, name), capacity))
+
+    def _parse(self, mentor):
+        """Validate a mentor and compute its stored fields; ValueError if it is malformed"""
+        if not isinstance(mentor, dict) or not isinstance(mentor.get('id'), (str, int)):
+            raise ValueError("Every mentor needs a string or integer id")
+
+        def invalid(message):
+            return ValueError(f"Mentor {mentor['id']!r}: {message}")
+
+        numbers = {}
+        for field in ('experienceYears', 'rating', 'totalMentees'):
+            value = mentor.get(field, 0)
+            try:
+                if isinstance(value, bool):
+                    raise TypeError
+                numbers[field] = float(value)
+            except (TypeError, ValueError):
+                raise invalid(f"{field} must be a number")
+
+        industry = mentor.get('industry', {})
+        if not isinstance(industry, dict):
+            raise invalid("industry must be an object")
+        keys = {'industry': industry.get('id'), 'location': mentor.get('location')}
+        for field, value in keys.items():
+            if value is not None and not isinstance(value, (str, int, float)):
+                raise invalid(f"{field} must be a string or number")
+
+        skills = mentor.get('skills', [])
+        if not isinstance(skills, list) or not all(isinstance(skill, dict) and isinstance(skill.get('name'), str)
+                                                   for skill in skills):
+            raise invalid("skills must be a list of {name} objects")
+        interests = mentor.get('interests', [])
+        if not isinstance(interests, list) or not all(isinstance(interest, str) for interest in interests):
+            raise invalid("interests must be a list of strings")
+        bio = mentor.get('bio')
+        if bio is not None and not isinstance(bio, str):
+            raise invalid("bio must be a string")
+
+        skills = [skill['name'].lower() for skill in skills]
+        interests = [interest.lower() for interest in interests]
+        bio_vector = self.embedder.embed(bio) if self.embedder is not None and bio is not None else None
+        return {
+            "numbers": numbers,
+            "industry": keys['industry'],
+            "location": keys['location'],
+            "skills": skills,
+            "interests": interests,
+            "bio_vector": bio_vector,
+            "profile_vector": profile_vector(self.embedder, bio, skills, interests),
+            "fingerprint": profile_fingerprint(mentor),
+        }
+
+    def _store(self, slot, fields):
+        self.experience[slot] = fields['numbers']['experienceYears']
+        self.rating[slot] = fields['numbers']['rating']
+        self.mentees[slot] = fields['numbers']['totalMentees']
+        self.industry_codes[slot] = self.industry_index.setdefault(fields['industry'], len(self.industry_index))
+        self.location_codes[slot] = self.location_index.setdefault(fields['location'], len(self.location_index))
+
+        self.skills.set(slot, fields['skills'])
+        self.interests.set(slot, fields['interests'])
+
+        self.bio_vectors[slot] = 0 if fields['bio_vector'] is None else fields['bio_vector']
+        self.profile_vectors[slot] = 0 if fields['profile_vector'] is None else fields['profile_vector']
+        self.fingerprints[slot] = fields['fingerprint']
+
+    def resolve(self, mentor_ids=None):
+        """Slots of the given mentor ids (unknown ids are skipped), or of every mentor"""
+        with self.lock:
+            if mentor_ids is None:
+                return np.arange(len(self.profiles))
+            return np.array([self.slots[i] for i in mentor_ids if i in self.slots], dtype=np.intp)
+
+    def candidates(self, student, count, slots=None, n_probe=1, pool_factor=4):
+        """
+        Slots of `count` likely top matches for the student, for full scoring.
+
+        The ANN index narrows all registered mentors down to about
+        `pool_factor * count` whose profile vectors are closest to the
+        student's; those (or the given `slots`) are then ranked by
+        proxy_scores. Without embeddings there is nothing to search, so
+        every slot is returned.
+        """
+        if count < 1:
+            raise ValueError("candidates must be at least 1")
+        with self.lock:
+            if slots is None:
+                slots = np.arange(len(self.profiles))
+            student_skills = [skill['name'].lower() for skill in student.get('skills', [])]
+            student_interests = [interest.lower() for interest in student.get('interests', [])]
+            query = profile_vector(self.embedder, student.get('bio'), student_skills, student_interests)
+            if query is None or count >= len(slots):
+                return slots
+            
+            if len(slots) == len(self.profiles):
+                # Retrain once the store has doubled since the centroids were fit
+                vectors = self.profile_vectors[:len(self.profiles)]
+                if not self.index.trained or len(vectors) > 2 * self.index.trained_size:
+                    self.index.train(vectors)
+                slots = self.index.probe(query, len(vectors), pool_factor * count, n_probe)
+                # Mentors with the highest student-independent score terms can
+                # rank well from any list, so they always join the pool
+                slots = np.union1d(slots, self._top_prior(count))
+                if count >= len(slots):
+                    return slots
+            
+            scores = self.proxy_scores(student, query, slots)
+            best = np.argpartition(-scores, count - 1)[:count]
+            return slots[best]
+
+    def _prior_scores(self, slots):
+        """Score terms that do not depend on the student (rating and mentees)"""
+        return 5 * self.rating[slots] + 2 * self.mentees[slots]
+
+    def _top_prior(self, count):
+        if self.prior_order is None:
+            self.prior_order = np.argsort(-self._prior_scores(np.arange(len(self.profiles))), kind='stable')
+        return self.prior_order[:count]
+
+    def proxy_scores(self, student, query, slots):
+        """
+        Cheap linear stand-in for the full match score.
+
+        Uses the simple_score_calculation weights, with the skill and interest
+        matches replaced by one profile-vector similarity, so it only touches
+        columns the store already holds.
+        """
+        n_skills = len(student.get('skills', []))
+        n_interests = len(student.get('interests', []))
+        semantic = np.maximum(self.profile_vectors[slots] @ query, 0)
+        industry = self.industry_codes[slots] == self.industry_index.get(student.get('industry', {}).get('id'), -1)
+        location = self.location_codes[slots] == self.location_index.get(student.get('location'), -1)
+        experience = np.maximum(0, 10 - np.abs(student.get('experienceYears', 0) - self.experience[slots]))
+        return ((15 * n_skills + 10 * n_interests) * semantic + 20 * industry + 10 * location
+                + 2 * experience + self._prior_scores(slots))
+
+    def fingerprint_of(self, mentor_id):
+        """Fingerprint of the stored profile of a mentor id, or None if it is unknown"""
+        with self.lock:
+            slot = self.slots.get(mentor_id)
+            return None if slot is None else self.fingerprints[slot]
+
+    def get_fingerprints(self, slots):
+        with self.lock:
+            return [self.fingerprints[slot] for slot in slots]
+
+    def get_profiles(self, slots):
+        with self.lock:
+            return [self.profiles[slot] for slot in slots]
+
+    def feature_matrix(self, student, slots):
+        """Feature matrix (same columns as build_feature_matrix) for the mentors at `slots`"""
+        slots = np.asarray(slots, dtype=np.intp)
+        features = np.zeros((len(slots), NUM_FEATURES))
+        if len(slots) == 0:
+            return features
+
+        with self.lock:
+            student_skills = [skill['name'].lower() for skill in student.get('skills', [])]
+            flat_ids, lengths = self.skills.gather(slots)
+            features[:, 0] = match_scores_from_ids(
+                student_skills, flat_ids, lengths, self.skills.phrase_ids, self.skills.matrix, self.embedder
+            )
+
+            # Values no mentor has get code -1, which never matches
+            industry = student.get('industry', {}).get('id')
+            features[:, 1] = self.industry_codes[slots] == self.industry_index.get(industry, -1)
+
+            student_interests = [interest.lower() for interest in student.get('interests', [])]
+            flat_ids, lengths = self.interests.gather(slots)
+            features[:, 2] = match_scores_from_ids(
+                student_interests, flat_ids, lengths, self.interests.phrase_ids, self.interests.matrix, self.embedder
+            )
+
+            features[:, 3] = self.location_codes[slots] == self.location_index.get(student.get('location'), -1)
+            features[:, 4] = np.abs(student.get('experienceYears', 0) - self.experience[slots])
+            features[:, 5] = self.rating[slots]
+            features[:, 6] = self.mentees[slots]
+
+            if self.embedder is not None and student.get('bio') is not None:
+                vector = self.embedder.embed(student['bio'])
+                if vector is not None:
+                    vector = vector.astype(self.embedder.compute_dtype)
+                    features[:, 7] = np.maximum(self.bio_vectors[slots] @ vector, 0)
+
+        return features
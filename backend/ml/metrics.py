@@ -0,0 +1,197 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Latency buckets in seconds (Prometheus client defaults plus finer low end)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    labels = _format_labels(self.labels, key, [("le", repr(float(bound)))])
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labels, key, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {repr(series['sum'])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {series['count']}")
+        return lines
+
+class Registry:
+    """
+    Metrics of one process in the Prometheus text exposition format.
+
+    Collectors are callables returning (name, type, help, value) tuples read
+    at scrape time, for numbers other objects already keep (cache counters).
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                samples = collector()
+            except Exception:
+                continue
+            for name, kind, help_text, value in samples:
+                lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}",
+                              f"{name} {_format_value(value)}"])
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'stage_duration_seconds', 'Time spent in each stage of a request', ('stage',))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'request_duration_seconds', 'Total time per handled request', ('endpoint', 'status'))
+REQUESTS = REGISTRY.counter(
+    'requests_total', 'Handled requests', ('endpoint', 'status'))
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Stage timings of the request being handled on this thread, for Server-Timing
+_local = threading.local()
+
+def start_timings():
+    _local.timings = {}
+    return _local.timings
+
+def finish_timings():
+    timings = getattr(_local, 'timings', None)
+    _local.timings = None
+    return timings or {}
+
+@contextmanager
+def stage(name):
+    """Time a block into STAGE_SECONDS and the current request's timings"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+def server_timing(timings):
+    """Server-Timing header value (durations in milliseconds)"""
+    return ', '.join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items())
+
+def record_request(endpoint, status, seconds):
+    REQUESTS.inc(endpoint=endpoint, status=status)
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint, status=status)
+
+def embedder_collector(get_embedder_fn):
+    """Collector exporting the phrase-cache and out-of-vocabulary counters of an embedder"""
+    def collect():
+        embedder = get_embedder_fn()
+        if embedder is None:
+            return []
+        stats = embedder.stats()
+        return [
+            ('embedding_cache_hits_total', 'counter', 'Phrase embedding cache hits', stats['hits']),
+            ('embedding_cache_misses_total', 'counter', 'Phrase embedding cache misses', stats['misses']),
+            ('embedding_cache_size', 'gauge', 'Phrases in the embedding cache', stats['size']),
+            ('embedding_oov_words_total', 'counter',
+             'Words of embedded phrases missing from the vocabulary', stats['oovWords']),
+            ('embedding_oov_phrases_total', 'counter',
+             'Embedded phrases without any in-vocabulary word', stats['oovPhrases']),
+        ]
+    return collect
+
+def traced(handle, endpoint):
+    """
+    Wrap a framed-worker handler (see framing.py) with request metrics.
+
+    {"op": "metrics"} returns the exposition text, and requests with
+    "timing": true get their stage timings back under "serverTiming".
+    """
+    def wrapper(data):
+        if data.get("op") == "metrics":
+            return {"contentType": CONTENT_TYPE, "text": REGISTRY.render()}
+        want_timing = bool(data.pop("timing", False))
+        start_timings()
+        start = time.perf_counter()
+        try:
+            result = handle(data)
+        except Exception:
+            finish_timings()
+            record_request(endpoint, "error", time.perf_counter() - start)
+            raise
+        timings = finish_timings()
+        record_request(endpoint, "ok", time.perf_counter() - start)
+        if want_timing and isinstance(result, dict):
+            result["serverTiming"] = server_timing(timings)
+        return result
+    return wrapper
@@ -0,0 +1,82 @@
+import pickle
+from datetime import datetime
+import numpy as np
+
+# Layout version of the bundle dict itself
+BUNDLE_FORMAT = 1
+
+def make_bundle(model, scaler, feature_names, metrics=None, version=None, feature_schema=None):
+    """
+    Package a fitted match model with the scaler it was trained behind.
+
+    `feature_schema` describes the training features (names, dtype and
+    per-feature mean, std, min and max), for checking inputs against them.
+    """
+    return {
+        "format": BUNDLE_FORMAT,
+        "version": version or datetime.now().strftime('%Y%m%d%H%M%S'),
+        "created_at": datetime.now().isoformat(),
+        "model": model,
+        "scaler": scaler,
+        "feature_names": list(feature_names),
+        "metrics": metrics or {},
+        "feature_schema": feature_schema,
+    }
+
+def save_bundle(bundle, path):
+    with open(path, 'wb') as f:
+        pickle.dump(bundle, f)
+
+def is_bundle(obj):
+    return isinstance(obj, dict) and 'model' in obj and 'format' in obj
+
+def load_bundle(path):
+    """
+    Load a model bundle.
+
+    A bare pickled estimator (the old create_model.py output) is wrapped as a
+    bundle without a scaler; that model was fit on unscaled features.
+    """
+    with open(path, 'rb') as f:
+        obj = pickle.load(f)
+    if is_bundle(obj):
+        return obj
+    return {
+        "format": 0,
+        "version": "legacy",
+        "model": obj,
+        "scaler": None,
+        "feature_names": None,
+        "metrics": {},
+    }
+
+def load_serving_bundle(path):
+    """
+    Load the match model for scoring.
+
+    Prefers the compiled forest next to the pickle (see forest.py), which
+    needs only NumPy; falls back to the pickled bundle when there is none or
+    it was compiled from an older model file.
+    """
+    from forest import load_compiled
+    compiled = load_compiled(path)
+    if compiled is not None:
+        return compiled
+    return load_bundle(path)
+
+def predict_scores(bundle, features):
+    """Match scores (0-100 ints) for a whole feature matrix in one transform/predict call"""
+    features = np.asarray(features, dtype=float)
+    if len(features) == 0:
+        return np.zeros(0, dtype=int)
+
+    expected = bundle.get('feature_names')
+    if expected is not None and len(expected) != features.shape[1]:
+        raise ValueError(f"Model expects {len(expected)} features, got {features.shape[1]}")
+
+    if bundle['scaler'] is not None:
+        features = bundle['scaler'].transform(features)
+    predictions = bundle['model'].predict(features)
+
+    # Scale score to 0-100 range, truncating like int() did per mentor
+    return np.clip(np.trunc(predictions * 100), 0, 100).astype(int)
@@ -0,0 +1,136 @@
+import os
+import multiprocessing
+import numpy as np
+import embeddings
+from embeddings import get_embedder
+from features import build_feature_matrix
+from metrics import REGISTRY
+from ranking import select_top
+from vector_store import load_word_vectors
+from wire import slice_columns
+
+# Scoring processes per pool; 0 or 1 keeps scoring on the calling core
+DEFAULT_WORKERS = int(os.environ.get('SCORING_WORKERS', 0))
+
+# Mentors sent to a worker per task
+DEFAULT_CHUNK_SIZE = int(os.environ.get('SCORING_CHUNK_SIZE', 2000))
+
+# Smaller requests are scored in-process, where fan-out would cost more than it saves
+DEFAULT_MIN_MENTORS = int(os.environ.get('SCORING_MIN_MENTORS', 10000))
+
+# Per-process state of a pool worker
+_worker = {}
+
+def _init_worker(word2vec_path, score_fn):
+    # Forked workers inherit the parent's embedder, whose word vectors are
+    # shared copy-on-write (or through the mapped vector store); other start
+    # methods map or load the vectors from disk once per worker
+    if 'embedder' not in _worker:
+        try:
+            _worker['embedder'] = get_embedder(load_word_vectors(word2vec_path))
+        except Exception:
+            # Same as a parent without word vectors: semantic features are 0
+            _worker['embedder'] = None
+    _worker['score_fn'] = score_fn
+
+def worker_locks(embedder=None):
+    """
+    Locks a scoring worker takes: the embedder caches and the metric series
+    that stage() records into. All of them are leaf locks, never held while
+    waiting for another lock.
+    """
+    locks = [embeddings._embedders_lock] + [metric.lock for metric in REGISTRY.metrics]
+    if embedder is not None:
+        locks.append(embedder.lock)
+    return locks
+
+def hold_across_fork(locks):
+    """
+    Acquire `locks` around every fork of this process, so that a forked
+    child never starts with one of them held by a thread it does not have.
+    That makes forking safe while other threads serve requests. Only leaf
+    locks may be passed, or the hook could deadlock against a thread
+    holding one while it waits for another.
+    """
+    def acquire():
+        for lock in locks:
+            lock.acquire()
+
+    def release():
+        for lock in reversed(locks):
+            lock.release()
+
+    os.register_at_fork(before=acquire, after_in_parent=release, after_in_child=release)
+
+def _score_chunk(task):
+    """Score one slice of the mentor list; returns (global indices, scores) of its best `keep`"""
+    student, mentors, columns, start, keep = task
+    scores = _worker['score_fn'](build_feature_matrix(student, mentors, _worker['embedder'], columns))
+    local = np.arange(len(scores)) if keep is None else np.sort(select_top(scores, keep))
+    return start + local, scores[local]
+
+class ScoringPool:
+    """
+    Process pool that scores large mentor lists in chunks.
+
+    `score_fn` maps a feature matrix to match scores. Each chunk returns only
+    its own best `keep` mentors, so the parent merges at most
+    keep * n_chunks candidates into the global top-k. Workers are forked
+    where possible so the models loaded by the parent are shared, not pickled;
+    without an `embedder` each worker loads the word vectors itself. The
+    locks the workers use are held across every fork (see hold_across_fork),
+    so the pool can be created, and can replace workers, while other threads
+    are busy with them.
+    """
+
+    def __init__(self, embedder, word2vec_path, score_fn, workers=DEFAULT_WORKERS,
+                 chunk_size=DEFAULT_CHUNK_SIZE, min_mentors=DEFAULT_MIN_MENTORS):
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self.min_mentors = min_mentors
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        if context.get_start_method() == 'fork':
+            hold_across_fork(worker_locks(embedder))
+        if embedder is not None:
+            _worker['embedder'] = embedder
+        try:
+            self.pool = context.Pool(workers, initializer=_init_worker, initargs=(word2vec_path, score_fn))
+        finally:
+            _worker.pop('embedder', None)
+
+    def should_split(self, n_mentors):
+        return n_mentors >= self.min_mentors and n_mentors > self.chunk_size
+
+    def score(self, student, mentors, keep=None, columns=None):
+        """
+        Scores of the mentors that can appear in the best `keep` ranks
+        (all mentors if keep is None), as (indices into mentors, scores) in
+        ascending index order. `columns` are packed numeric mentor fields.
+        """
+        tasks = ((student, mentors[start:start + self.chunk_size],
+                  slice_columns(columns, start, start + self.chunk_size), start, keep)
+                 for start in range(0, len(mentors), self.chunk_size))
+        parts = list(self.pool.imap(_score_chunk, tasks))
+        if not parts:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=int)
+        indices, scores = zip(*parts)
+        return np.concatenate(indices), np.concatenate(scores)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+def create_pool(embedder, word2vec_path, score_fn, workers=None, chunk_size=None, min_mentors=None):
+    """A ScoringPool when more than one worker is configured, otherwise None"""
+    workers = DEFAULT_WORKERS if workers is None else workers
+    if workers <= 1:
+        return None
+    return ScoringPool(embedder, word2vec_path, score_fn, workers,
+                       DEFAULT_CHUNK_SIZE if chunk_size is None else chunk_size,
+                       DEFAULT_MIN_MENTORS if min_mentors is None else min_mentors)
+
+def keep_for_page(top_k, offset):
+    """How many of each chunk's best mentors the requested page can need"""
+    return None if top_k is None else max(0, offset) + max(0, top_k)
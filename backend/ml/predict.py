@@ -1,63 +1,130 @@
 import sys
 import json
-import pickle
+import argparse
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 import os
-import gensim
+import functools
+from framing import serve_stdio, serve_unix_socket
+from embeddings import get_embedder
+from features import build_feature_matrix, list_match_scores
+from ranking import parse_page, rank_mentors
+from vector_store import load_word_vectors
+from model_bundle import load_serving_bundle, predict_scores
+from parallel import create_pool, keep_for_page
+from metrics import REGISTRY, embedder_collector, stage, traced
+from wire import mentor_columns
+from cohort import assignment_options, cohort_response, cohort_scores, cohort_store
+from score_cache import SCORE_CACHE_ENABLED, PairScoreCache, cached_scores, file_version, mentor_fingerprints, profile_fingerprint
 
-def main():
-    # Read input data from stdin
-    input_data = sys.stdin.read()
-    data = json.loads(input_data)
+MODEL_PATH = os.path.join(os.path.dirname(__file__), '../../src/ml_model.pkl')
+WORD2VEC_PATH = os.path.join(os.path.dirname(__file__), '../../src/trained_word2vec.pkl')
+
+def load_models():
+    """Load the match model bundle and the Word2Vec model"""
+    # Look for the model in the src directory instead
+    bundle = load_serving_bundle(MODEL_PATH)
+    print(f"Match model version {bundle['version']} loaded ({type(bundle['model']).__name__})", file=sys.stderr)
+    
+    # Load the Word2Vec model
+    try:
+        # Prefers the memory-mapped vector store when one is exported
+        word2vec_model = load_word_vectors(WORD2VEC_PATH)
+        print(f"Word2Vec model loaded successfully ({type(word2vec_model).__name__})", file=sys.stderr)
+    except Exception as e:
+        print(f"Error loading Word2Vec model: {e}", file=sys.stderr)
+        word2vec_model = None
     
+    return bundle, word2vec_model
+
+def score_mentors(data, bundle, word2vec_model, pool=None, cache=None, version=None):
+    """
+    Score every mentor in a request against the student and return the ranked result.
+
+    With a PairScoreCache only the pairs it does not hold under `version` (see
+    score_version) are scored, unless the request passes "cache": false.
+    """
     student = data['student']
     mentors = data['mentors']
+    page = parse_page(data)
+    # Numeric fields sent as packed arrays instead of per-mentor keys
+    columns = mentor_columns(data, len(mentors))
     
-    try:
-        # Load the ML model from .pkl file
-        import os
-        # Look for the model in the src directory instead
-        model_path = os.path.join(os.path.dirname(__file__), '../../src/ml_model.pkl')
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
-        
-        # Load the Word2Vec model
-        word2vec_path = os.path.join(os.path.dirname(__file__), '../../src/trained_word2vec.pkl')
-        try:
-            with open(word2vec_path, 'rb') as f:
-                word2vec_model = pickle.load(f)
-            print("Word2Vec model loaded successfully", file=sys.stderr)
-        except Exception as e:
-            print(f"Error loading Word2Vec model: {e}", file=sys.stderr)
-            word2vec_model = None
+    if pool is not None and pool.should_split(len(mentors)):
+        # Large list: score chunks on the process pool and merge their best mentors
+        with stage('parallel_scoring'):
+            indices, match_scores = pool.score(student, mentors, keep_for_page(page['top_k'], page['offset']), columns)
+        with stage('ranking'):
+            scored_mentors = rank_mentors(mentors, match_scores, indices=indices, columns=columns, **page)
+        return {'mentors': scored_mentors, 'total': len(mentors)}
+    
+    def score_positions(positions):
+        if len(positions) == len(mentors):
+            subset, subset_columns = mentors, columns
+        else:
+            subset = [mentors[i] for i in positions]
+            subset_columns = None if columns is None else {field: values[positions] for field, values in columns.items()}
         
-        # Process each mentor and calculate match score
-        scored_mentors = []
-        for mentor in mentors:
-            # Extract features for the student-mentor pair
-            features = extract_features(student, mentor, word2vec_model)
-            
-            # Normalize features
-            scaler = StandardScaler()
-            features_scaled = scaler.fit_transform([features])[0]
-            
-            # Predict match score using the model
-            match_score = model.predict([features_scaled])[0]
-            
-            # Scale score to 0-100 range
-            match_score = min(100, max(0, int(match_score * 100)))
-            
-            # Add match score to mentor data
-            scored_mentor = mentor.copy()
-            scored_mentor['matchScore'] = match_score
-            scored_mentors.append(scored_mentor)
+        # Extract features for every student-mentor pair at once
+        with stage('features'):
+            feature_matrix = build_feature_matrix(student, subset, get_embedder(word2vec_model), subset_columns)
         
-        # Sort mentors by match score
-        scored_mentors.sort(key=lambda x: x['matchScore'], reverse=True)
+        # Scale with the scaler saved alongside the model and predict all mentors in one call
+        with stage('scoring'):
+            return predict_scores(bundle, feature_matrix)
+    
+    if cache is not None and data.get('cache', True) is not False:
+        # Only pairs missing from the cache are featurized and scored
+        with stage('fingerprint'):
+            student_fingerprint = profile_fingerprint(student)
+            mentor_fps = mentor_fingerprints(mentors, columns)
+        match_scores = cached_scores(cache, version, student_fingerprint, mentor_fps, score_positions)
+    else:
+        match_scores = score_positions(np.arange(len(mentors)))
+    
+    # Rank mentors by match score, building entries only for the requested page
+    with stage('ranking'):
+        scored_mentors = rank_mentors(mentors, match_scores, columns=columns, **page)
+    
+    return {'mentors': scored_mentors, 'total': len(mentors)}
+
+def match_cohort(data, bundle, word2vec_model):
+    """Score a cohort of students against the request's mentors at once (see cohort.py)"""
+    students = data['students']
+    store = cohort_store(data['mentors'], get_embedder(word2vec_model))
+    slots = store.resolve()
+    mentors = store.get_profiles(slots)
+    # Reject a bad page or assignment option before any scoring
+    parse_page(data)
+    if data.get('assign'):
+        assignment_options(data, mentors)
+    
+    with stage('cohort_scoring'):
+        scores = cohort_scores(students, lambda student: store.feature_matrix(student, slots),
+                               len(slots), functools.partial(predict_scores, bundle))
+    
+    with stage('assignment' if data.get('assign') else 'ranking'):
+        return cohort_response(data, students, mentors, scores)
+
+def score_version(bundle):
+    """Model version part of pair-score cache keys: the bundle version and the files loaded"""
+    return f"{bundle['version']}|{file_version(MODEL_PATH, WORD2VEC_PATH)}"
+
+def start_pool(bundle, word2vec_model, workers=None, chunk_size=None, min_mentors=None):
+    """Process pool for large requests, or None unless more than one scoring worker is configured"""
+    return create_pool(get_embedder(word2vec_model), WORD2VEC_PATH, functools.partial(predict_scores, bundle),
+                       workers, chunk_size, min_mentors)
+
+def main(pool_options=None):
+    # Read input data from stdin
+    input_data = sys.stdin.read()
+    data = json.loads(input_data)
+    
+    try:
+        bundle, word2vec_model = load_models()
+        pool = start_pool(bundle, word2vec_model, **(pool_options or {}))
         
         # Return results
-        result = {'mentors': scored_mentors}
+        result = score_mentors(data, bundle, word2vec_model, pool)
         print(json.dumps(result))
         
     except Exception as e:
@@ -65,30 +132,67 @@ def main():
         print(json.dumps({'error': str(e)}), file=sys.stderr)
         sys.exit(1)
 
+def run_worker(socket_path=None, threads=4, pool_options=None):
+    """
+    Load the models once and keep serving requests.
+
+    Requests are length-prefixed JSON or MessagePack frames (see framing.py)
+    carrying the same {"student", "mentors"} body as the one-shot mode plus an
+    "id" that is echoed back, so callers can pipeline requests over one pipe or
+    socket. Numeric mentor fields may come packed in "mentorColumns".
+    {"op": "cohort", "students", "mentors"} matches a whole cohort at once.
+    If the models cannot be loaded the worker keeps running and answers every
+    request with the load error.
+    """
+    try:
+        bundle, word2vec_model = load_models()
+    except Exception as e:
+        # Stay up and fail each request instead, so callers fall back at once
+        # rather than waiting on a worker that is about to exit and respawn
+        print(f"Error loading models: {e}; answering requests with an error", file=sys.stderr)
+        serve(traced(unavailable_handler(e), 'predict'), socket_path, threads)
+        return
+    
+    # Forked before the request threads start
+    pool = start_pool(bundle, word2vec_model, **(pool_options or {}))
+    # Repeated (student, mentor) pairs are answered from memory; SCORE_CACHE=0 turns it off
+    cache = PairScoreCache() if SCORE_CACHE_ENABLED else None
+    version = score_version(bundle)
+    
+    def handle(data):
+        if data.get('op') == 'cohort':
+            return match_cohort(data, bundle, word2vec_model)
+        if data.get('op') == 'score_cache_stats':
+            return cache.stats() if cache else {"enabled": False}
+        return score_mentors(data, bundle, word2vec_model, pool, cache, version)
+    
+    # Stage latencies and cache counters, read with {"op": "metrics"}
+    REGISTRY.add_collector(embedder_collector(lambda: get_embedder(word2vec_model)))
+    serve(traced(handle, 'predict'), socket_path, threads)
+
+def unavailable_handler(error):
+    """Handler of a worker whose models failed to load: every request gets the load error"""
+    message = f"Match model unavailable: {error}"
+    
+    def handle(data):
+        raise RuntimeError(message)
+    
+    return handle
+
+def serve(handle, socket_path=None, threads=4):
+    if socket_path:
+        serve_unix_socket(socket_path, handle, max_workers=threads)
+    else:
+        serve_stdio(handle, max_workers=threads)
+
 def calculate_text_similarity(text1, text2, word2vec_model):
     """Calculate semantic similarity between two texts using Word2Vec"""
     if word2vec_model is None:
         return 0
     
     try:
-        # Convert texts to lowercase and split into words
-        words1 = text1.lower().split()
-        words2 = text2.lower().split()
-        
-        # Filter words that exist in the model's vocabulary
-        words1 = [word for word in words1 if word in word2vec_model.wv.key_to_index]
-        words2 = [word for word in words2 if word in word2vec_model.wv.key_to_index]
-        
-        if not words1 or not words2:
-            return 0
-        
-        # Calculate average vector for each text
-        vec1 = sum(word2vec_model.wv[word] for word in words1) / len(words1)
-        vec2 = sum(word2vec_model.wv[word] for word in words2) / len(words2)
-        
-        # Calculate cosine similarity
-        similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-        return max(0, similarity)  # Ensure non-negative
+        # Phrase vectors come from the process-wide LRU cache
+        return get_embedder(word2vec_model).similarity(text1, text2)
     except Exception as e:
         print(f"Error calculating text similarity: {e}", file=sys.stderr)
         return 0
@@ -101,30 +205,9 @@ def extract_features(student, mentor, word2vec_model=None):
     student_skills = [s['name'].lower() for s in student['skills']]
     mentor_skills = [s['name'].lower() for s in mentor['skills']]
     
-    # Direct match (exact skills)
-    student_skills_set = set(student_skills)
-    mentor_skills_set = set(mentor_skills)
-    common_skills = student_skills_set.intersection(mentor_skills_set)
-    direct_match = len(common_skills)
-    
-    # Semantic match (using Word2Vec)
-    semantic_match = 0
-    if word2vec_model is not None:
-        # For each student skill, find the best matching mentor skill
-        for s_skill in student_skills:
-            if s_skill in mentor_skills_set:  # Skip if already directly matched
-                continue
-            
-            # Calculate similarity with each mentor skill
-            max_similarity = 0
-            for m_skill in mentor_skills:
-                similarity = calculate_text_similarity(s_skill, m_skill, word2vec_model)
-                max_similarity = max(max_similarity, similarity)
-            
-            semantic_match += max_similarity
-    
-    # Combine direct and semantic matches
-    skills_match = direct_match + semantic_match
+    # Direct match count plus the best semantic match of each remaining skill,
+    # taken from one student x mentor similarity matrix
+    skills_match = list_match_scores(student_skills, [mentor_skills], get_embedder(word2vec_model))[0]
     features.append(skills_match)
     
     # Industry match (binary)
@@ -135,30 +218,8 @@ def extract_features(student, mentor, word2vec_model=None):
     student_interests = [i.lower() for i in student['interests']]
     mentor_interests = [i.lower() for i in mentor['interests']]
     
-    # Direct match (exact interests)
-    student_interests_set = set(student_interests)
-    mentor_interests_set = set(mentor_interests)
-    common_interests = student_interests_set.intersection(mentor_interests_set)
-    direct_match = len(common_interests)
-    
-    # Semantic match (using Word2Vec)
-    semantic_match = 0
-    if word2vec_model is not None:
-        # For each student interest, find the best matching mentor interest
-        for s_interest in student_interests:
-            if s_interest in mentor_interests_set:  # Skip if already directly matched
-                continue
-            
-            # Calculate similarity with each mentor interest
-            max_similarity = 0
-            for m_interest in mentor_interests:
-                similarity = calculate_text_similarity(s_interest, m_interest, word2vec_model)
-                max_similarity = max(max_similarity, similarity)
-            
-            semantic_match += max_similarity
-    
-    # Combine direct and semantic matches
-    interests_match = direct_match + semantic_match
+    # Direct match count plus the best semantic match of each remaining interest
+    interests_match = list_match_scores(student_interests, [mentor_interests], get_embedder(word2vec_model))[0]
     features.append(interests_match)
     
     # Location match (binary)
@@ -185,4 +246,25 @@ def extract_features(student, mentor, word2vec_model=None):
     return features
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Score mentors for a student")
+    parser.add_argument('--worker', action='store_true',
+                        help="keep the models loaded and serve framed requests on stdin/stdout")
+    parser.add_argument('--socket', help="serve framed requests on this Unix socket instead")
+    parser.add_argument('--threads', type=int, default=4,
+                        help="requests handled concurrently by one worker")
+    parser.add_argument('--scoring-workers', type=int,
+                        help="processes that score large mentor lists in parallel (default SCORING_WORKERS, off)")
+    parser.add_argument('--chunk-size', type=int, help="mentors per parallel scoring task")
+    parser.add_argument('--min-parallel-mentors', type=int,
+                        help="smallest mentor list that is split across the scoring workers")
+    args = parser.parse_args()
+    pool_options = {
+        "workers": args.scoring_workers,
+        "chunk_size": args.chunk_size,
+        "min_mentors": args.min_parallel_mentors,
+    }
+    
+    if args.worker or args.socket:
+        run_worker(args.socket, args.threads, pool_options)
+    else:
+        main(pool_options)
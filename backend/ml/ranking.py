@@ -0,0 +1,120 @@
+import math
+import numpy as np
+
+def select_top(scores, top_k=None, offset=0):
+    """
+    Indices of ranks [offset, offset + top_k) by descending score.
+
+    Ties keep their input order, so the result is the same slice a stable sort
+    of the whole list would give, but only the selected entries are sorted.
+    """
+    keys = -np.asarray(scores, dtype=float)
+    n = len(keys)
+    offset = max(0, offset)
+    end = n if top_k is None else min(n, offset + max(0, top_k))
+    if end <= offset:
+        return np.zeros(0, dtype=np.intp)
+
+    if end < n:
+        # Everything strictly better than the end-th key, then ties in input order
+        kth = np.partition(keys, end - 1)[end - 1]
+        better = np.flatnonzero(keys < kth)
+        ties = np.flatnonzero(keys == kth)[:end - len(better)]
+        chosen = np.concatenate([better, ties])
+    else:
+        chosen = np.arange(n)
+
+    order = chosen[np.lexsort((chosen, keys[chosen]))]
+    return order[offset:end]
+
+def rank_mentors(mentors, scores, top_k=None, offset=0, fields=None, indices=None, columns=None):
+    """
+    Build the response list for the selected ranks.
+
+    Only the returned mentors are copied. With `fields`, each entry holds just
+    those mentor fields plus matchScore instead of the whole profile.
+
+    With `indices`, scores[i] is the score of mentors[indices[i]]: a subset in
+    ascending index order that contains every mentor the page can need.
+
+    `columns` are numeric mentor fields sent as packed arrays (see
+    wire.mentor_columns); they are put back into the returned entries.
+    """
+    results = []
+    for position in select_top(scores, top_k, offset):
+        index = position if indices is None else indices[position]
+        mentor = mentors[index]
+        if columns:
+            mentor = dict(mentor, **{field: values[index].item() for field, values in columns.items()})
+        results.append(mentor_entry(mentor, scores[position], fields))
+    return results
+
+def mentor_entry(mentor, score, fields=None):
+    """Response entry for one mentor: a copy of the profile (or just `fields`) plus matchScore"""
+    if fields is None:
+        entry = mentor.copy()
+    else:
+        entry = {field: mentor[field] for field in fields if field in mentor}
+    entry['matchScore'] = int(score)
+    return entry
+
+def keep_best(indices, scores, keep=None):
+    """
+    The (indices, scores) entries that can still reach the best `keep` ranks,
+    in their original order; used to merge scores arriving in chunks.
+    """
+    if keep is None:
+        return indices, scores
+    chosen = np.sort(select_top(scores, keep))
+    return indices[chosen], scores[chosen]
+
+def int_option(data, name, default=None, minimum=0):
+    """An integer request option of at least `minimum`, else ValueError (a 400 for the endpoints)"""
+    value = data.get(name)
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return number
+
+def number_option(data, name, default=None, minimum=None):
+    """A finite numeric request option of at least `minimum`, else ValueError"""
+    value = data.get(name)
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a finite number")
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return number
+
+def parse_page(data):
+    """
+    Read the top_k / offset / fields options of a predict request.
+
+    Raises ValueError for values a client got wrong (the endpoints answer 400):
+    a top_k below 1, a negative offset, or fields that are not a list (or
+    comma-separated string) of field names.
+    """
+    fields = data.get('fields')
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    elif fields is not None and (not isinstance(fields, list) or not all(isinstance(field, str) for field in fields)):
+        raise ValueError("fields must be a list of field names")
+    return {
+        "top_k": int_option(data, 'top_k', None, 1),
+        "offset": int_option(data, 'offset', 0, 0),
+        "fields": fields
+    }
@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Student x mentor scores kept per process
+DEFAULT_MAX_PAIRS = int(os.environ.get('SCORE_CACHE_SIZE', 1000000))
+
+# SCORE_CACHE=0 turns the cache off (requests can also pass "cache": false)
+SCORE_CACHE_ENABLED = os.environ.get('SCORE_CACHE', '1') != '0'
+
+def _profile_fields(profile, columns=None, index=None):
+    """The fields create_feature_vector reads, as a tuple"""
+    def numeric(field):
+        if columns is not None and field in columns:
+            return columns[field][index].item()
+        return profile.get(field, 0)
+
+    # Names are hashed as sent: profiles that differ only in case miss each
+    # other's entries, which costs a recomputation but never a wrong score
+    return (
+        [skill['name'] for skill in profile.get('skills', ())],
+        list(profile.get('interests', ())),
+        profile.get('industry', {}).get('id'),
+        profile.get('location'),
+        numeric('experienceYears'),
+        numeric('rating'),
+        numeric('totalMentees'),
+        profile.get('bio'),
+    )
+
+def profile_fingerprint(profile, columns=None, index=None):
+    """
+    Digest of every profile field that feeds the match features.
+
+    Students and mentors are fingerprinted the same way (a student's rating
+    and totalMentees are not used, but hashing them costs nothing). With
+    `columns`, numeric fields of the profile at `index` come from the packed
+    arrays (see wire.mentor_columns).
+
+    The fingerprint is a 128-bit BLAKE2b digest of the fields as canonical
+    JSON, so it is the same in every process and two profiles only share one
+    if their fields are equal. Raises ValueError for a profile whose fields
+    do not have the request shape (a skill without a name, a value JSON
+    cannot hold).
+    """
+    try:
+        fields = _profile_fields(profile, columns, index)
+        canonical = json.dumps(fields, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    except (TypeError, KeyError, AttributeError, ValueError) as e:
+        raise ValueError(f"Profile cannot be fingerprinted: {e!r}") from None
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+def mentor_fingerprints(mentors, columns=None):
+    return [profile_fingerprint(mentor, columns, i) for i, mentor in enumerate(mentors)]
+
+class PairScoreCache:
+    """
+    Match scores by (model version, student fingerprint, mentor fingerprint).
+
+    Entries are grouped in one row per student and model version, evicted
+    least recently used row first once more than `max_pairs` scores are held.
+    A changed profile has a new fingerprint, so it can never hit stale
+    entries; invalidate_mentors() also frees the old ones right away.
+    """
+
+    def __init__(self, max_pairs=DEFAULT_MAX_PAIRS):
+        self.max_pairs = max_pairs
+        self.lock = threading.Lock()
+        self.rows = OrderedDict()
+        self.mentor_rows = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, version, student_fp, mentor_fps):
+        """(scores, missing positions); scores at the missing positions are 0"""
+        key = (version, student_fp)
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                found = [None] * len(mentor_fps)
+            else:
+                self.rows.move_to_end(key)
+                found = [row.get(fp) for fp in mentor_fps]
+            missing = np.array([i for i, value in enumerate(found) if value is None], dtype=np.intp)
+            self.hits += len(found) - len(missing)
+            self.misses += len(missing)
+        if len(missing) == len(found):
+            return np.zeros(len(found), dtype=np.int64), missing
+        scores = np.array([0 if value is None else value for value in found], dtype=np.int64)
+        return scores, missing
+
+    def store(self, version, student_fp, mentor_fps, scores):
+        if len(mentor_fps) > self.max_pairs:
+            return
+        key = (version, student_fp)
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                row = self.rows[key] = {}
+            else:
+                self.rows.move_to_end(key)
+            for fp, score in zip(mentor_fps, scores):
+                if fp not in row:
+                    self.size += 1
+                    self.mentor_rows.setdefault(fp, set()).add(key)
+                row[fp] = int(score)
+            while self.size > self.max_pairs:
+                self._drop_row(next(iter(self.rows)))
+                self.evictions += 1
+
+    def _drop_row(self, key):
+        row = self.rows.pop(key)
+        self.size -= len(row)
+        for fp in row:
+            keys = self.mentor_rows.get(fp)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.mentor_rows[fp]
+
+    def invalidate_mentors(self, mentor_fps):
+        """Drop every cached score of the given mentor fingerprints"""
+        with self.lock:
+            for fp in mentor_fps:
+                for key in self.mentor_rows.pop(fp, ()):
+                    row = self.rows.get(key)
+                    if row is not None and fp in row:
+                        del row[fp]
+                        self.size -= 1
+
+    def clear(self):
+        with self.lock:
+            self.rows.clear()
+            self.mentor_rows.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self.size,
+                "maxSize": self.max_pairs,
+                "students": len(self.rows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": self.hits / lookups if lookups else 0.0
+            }
+
+def cached_scores(cache, version, student_fp, mentor_fps, score_missing):
+    """
+    Scores of every mentor: cached pairs merged with score_missing(positions)
+    for the rest, which are cached for the next request
+    """
+    scores, missing = cache.lookup(version, student_fp, mentor_fps)
+    if len(missing):
+        computed = np.asarray(score_missing(missing))
+        scores[missing] = computed
+        cache.store(version, student_fp, [mentor_fps[i] for i in missing], computed)
+    return scores
+
+def file_version(*paths):
+    """Version string for models loaded from files: their sizes and mtimes"""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return '|'.join(parts)
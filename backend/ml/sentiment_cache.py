@@ -0,0 +1,122 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from embeddings import normalize_phrase
+
+# Results kept in memory per cache
+DEFAULT_CACHE_SIZE = int(os.environ.get('SENTIMENT_CACHE_SIZE', 50000))
+
+def default_cache_path(model_path):
+    """SQLite file the results of a model are persisted to (next to the model)"""
+    return os.path.splitext(model_path)[0] + '.cache.sqlite'
+
+def model_identity(model_path):
+    """Path, size and mtime of the model file; any change to the model changes it"""
+    stat = os.stat(model_path)
+    return f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+def text_key(text, identity):
+    """Content address of a text's result under one model"""
+    # The TF-IDF pipeline lowercases and tokenizes on word boundaries, so texts
+    # that differ only in case or spacing get the same result
+    return hashlib.sha256(f"{identity}\0{normalize_phrase(text)}".encode('utf-8')).hexdigest()
+
+class SentimentCache:
+    """
+    Sentiment results by content address: an LRU in memory in front of a
+    SQLite table.
+
+    Keys hash the normalized text together with the model identity, so a
+    retrained model never sees the old model's results; rows of other models
+    are dropped when the cache is opened.
+    """
+
+    def __init__(self, identity, db_path=None, max_size=DEFAULT_CACHE_SIZE):
+        self.identity = identity
+        self.max_size = max_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS results "
+                            "(key TEXT PRIMARY KEY, model TEXT, sentiment TEXT, score REAL)")
+            self.db.execute("DELETE FROM results WHERE model != ?", (identity,))
+            self.db.commit()
+
+    def key(self, text):
+        return text_key(text, self.identity)
+
+    def get_many(self, keys):
+        """Cached (sentiment, score) for the keys that have one"""
+        found = {}
+        with self.lock:
+            missing = []
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                    self.hits += 1
+                else:
+                    missing.append(key)
+
+            if self.db is not None and missing:
+                unique = list(dict.fromkeys(missing))
+                # Chunked to stay under SQLite's bound-parameter limit
+                for start in range(0, len(unique), 500):
+                    chunk = unique[start:start + 500]
+                    rows = self.db.execute(
+                        f"SELECT key, sentiment, score FROM results WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk).fetchall()
+                    for key, sentiment, score in rows:
+                        found[key] = (sentiment, score)
+                        self._remember(key, (sentiment, score))
+
+            disk_hits = sum(1 for key in missing if key in found)
+            self.disk_hits += disk_hits
+            self.misses += len(missing) - disk_hits
+        return found
+
+    def put_many(self, items):
+        """Store {key: (sentiment, score)}"""
+        with self.lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            if self.db is not None and items:
+                self.db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                    [(key, self.identity, sentiment, score)
+                                     for key, (sentiment, score) in items.items()])
+                self.db.commit()
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stored = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0] if self.db is not None else None
+            return {
+                "size": len(self.memory),
+                "maxSize": self.max_size,
+                "stored": stored,
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "hitRate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM results")
+                self.db.commit()
@@ -0,0 +1,79 @@
+import time
+import threading
+from contextlib import contextmanager
+
+class StartupTracker:
+    """
+    Cold-start progress of a server process.
+
+    Records how long each startup phase took (and the error of any that
+    failed) and whether the process is ready for traffic, for readiness probes
+    and the startup timing breakdown.
+    """
+
+    def __init__(self, started_at=None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.errors = {}
+        self.state = 'starting'
+        self.ready_after = None
+        self.ready_event = threading.Event()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a startup phase; an exception is recorded against it and re-raised"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            with self.lock:
+                self.errors[name] = str(e)
+            raise
+        finally:
+            with self.lock:
+                self.phases[name] = time.perf_counter() - start
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.phases[name] = seconds
+
+    def set_state(self, state):
+        with self.lock:
+            self.state = state
+
+    def mark_ready(self):
+        with self.lock:
+            self.state = 'ready'
+            self.ready_after = time.perf_counter() - self.started_at
+        self.ready_event.set()
+
+    def mark_failed(self):
+        with self.lock:
+            self.state = 'failed'
+
+    @property
+    def ready(self):
+        return self.ready_event.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the process is ready; False if the timeout passed first"""
+        return self.ready_event.wait(timeout)
+
+    def report(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "ready": self.state == 'ready',
+                "uptimeSeconds": time.perf_counter() - self.started_at,
+                "readyAfterSeconds": self.ready_after,
+                "phasesMs": {name: seconds * 1000 for name, seconds in self.phases.items()},
+                "errors": dict(self.errors)
+            }
+
+    def summary(self):
+        """One-line timing breakdown for the startup log"""
+        with self.lock:
+            phases = ', '.join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+            total = f"{self.ready_after:.2f}s" if self.ready_after is not None else "not ready"
+            return f"Startup ({self.state}, {total}): {phases}"
@@ -0,0 +1,315 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+from collections import deque
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from embeddings import get_embedder
+from features import FEATURE_NAMES, NUM_FEATURES, build_feature_matrix
+from forest import export_bundle
+from model_bundle import make_bundle, save_bundle
+from score_cache import profile_fingerprint
+from vector_store import load_word_vectors
+
+# Where predict.py and server.py look for the match model and word vectors
+MODEL_PATH = os.path.join(os.path.dirname(__file__), '../../src/ml_model.pkl')
+WORD2VEC_PATH = os.path.join(os.path.dirname(__file__), '../../src/trained_word2vec.pkl')
+
+# Pairs read and featurized per task
+DEFAULT_CHUNK_SIZE = 10000
+
+# Training rows kept for fitting; larger inputs are sampled down uniformly
+DEFAULT_MAX_ROWS = 5000000
+
+# Per-process state of a feature worker
+_worker = {}
+
+def _init_worker(word2vec_path):
+    # Forked workers inherit the parent's embedder; other start methods load it once
+    if 'embedder' not in _worker:
+        _worker['embedder'] = get_embedder(load_word_vectors(word2vec_path)) if word2vec_path else None
+
+def read_chunks(paths, chunk_size):
+    """
+    Raw records of every file, `chunk_size` at a time.
+
+    .jsonl/.ndjson lines are passed on unparsed (the feature workers parse
+    them); CSV rows become dicts. Only one chunk is held at a time.
+    """
+    chunk = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            if path.endswith('.csv'):
+                records = csv.DictReader(f)
+            else:
+                records = (line for line in f if line.strip())
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+def _profile(value):
+    # CSV cells hold the profiles as JSON text
+    return json.loads(value) if isinstance(value, str) else value
+
+def featurize_chunk(records, target, embedder=None):
+    """
+    (features, targets, skipped) for a chunk of pair records.
+
+    A record is {"student", "mentor", <target>} (profiles as objects, or JSON
+    text in CSV), or carries the FEATURE_NAMES columns directly. Features come
+    from build_feature_matrix, the code that serves predictions, called once
+    per distinct student in the chunk. Records without a numeric target or
+    with malformed profiles are skipped.
+    """
+    features = np.zeros((len(records), NUM_FEATURES), dtype=np.float32)
+    targets = np.zeros(len(records), dtype=np.float32)
+    keep = np.zeros(len(records), dtype=bool)
+    groups = {}
+
+    for position, record in enumerate(records):
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+            targets[position] = float(record[target])
+            if all(record.get(name) not in (None, '') for name in FEATURE_NAMES):
+                features[position] = [float(record[name]) for name in FEATURE_NAMES]
+            else:
+                student, mentor = _profile(record['student']), _profile(record['mentor'])
+                group = groups.setdefault(profile_fingerprint(student), (student, [], []))
+                group[1].append(position)
+                group[2].append(mentor)
+            keep[position] = True
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+
+    for student, positions, mentors in groups.values():
+        try:
+            features[positions] = build_feature_matrix(student, mentors, embedder)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            keep[positions] = False
+
+    return features[keep], targets[keep], int((~keep).sum())
+
+def _featurize_task(task):
+    records, target = task
+    return featurize_chunk(records, target, _worker.get('embedder'))
+
+def featurized_chunks(paths, target, embedder, word2vec_path, workers, chunk_size):
+    """
+    featurize_chunk results for every chunk, in input order.
+
+    With more than one worker, chunks are featurized on a forked process
+    pool; at most two chunks per worker are in flight, so reading never runs
+    ahead of feature extraction.
+    """
+    chunks = read_chunks(paths, chunk_size)
+    if workers <= 1:
+        for records in chunks:
+            yield featurize_chunk(records, target, embedder)
+        return
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    _worker['embedder'] = embedder
+    try:
+        pool = context.Pool(workers, initializer=_init_worker, initargs=(word2vec_path,))
+    finally:
+        del _worker['embedder']
+    try:
+        pending = deque()
+        for records in chunks:
+            pending.append(pool.apply_async(_featurize_task, ((records, target),)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.close()
+        pool.join()
+
+class RowFile:
+    """Float32 rows appended to a temporary file and read back memory-mapped"""
+
+    def __init__(self, directory, name, width):
+        self.path = os.path.join(directory, name)
+        self.width = width
+        self.rows = 0
+        self.file = open(self.path, 'wb')
+
+    def append(self, rows):
+        np.ascontiguousarray(rows, dtype=np.float32).tofile(self.file)
+        self.rows += len(rows)
+
+    def load(self):
+        self.file.close()
+        shape = (self.rows, self.width) if self.width > 1 else (self.rows,)
+        if self.rows == 0:
+            return np.zeros(shape, dtype=np.float32)
+        return np.memmap(self.path, dtype=np.float32, mode='r', shape=shape)
+
+def scale_rows(scaler, X, chunk_size):
+    """scaler.transform(X) as float32, a chunk at a time (no float64 copy of X)"""
+    out = np.empty(X.shape, dtype=np.float32)
+    for start in range(0, len(X), chunk_size):
+        out[start:start + chunk_size] = scaler.transform(X[start:start + chunk_size])
+    return out
+
+def evaluate(model, scaler, X, y, chunk_size):
+    """Validation error metrics, computed a chunk at a time"""
+    n = len(y)
+    if n == 0:
+        return {}
+    squared = absolute = total = total_squares = 0.0
+    for start in range(0, n, chunk_size):
+        predictions = model.predict(scaler.transform(X[start:start + chunk_size]))
+        actual = np.asarray(y[start:start + chunk_size], dtype=float)
+        errors = predictions - actual
+        squared += float(errors @ errors)
+        absolute += float(np.abs(errors).sum())
+        total += float(actual.sum())
+        total_squares += float(actual @ actual)
+    variance = total_squares - total * total / n
+    return {
+        "rmse": (squared / n) ** 0.5,
+        "mae": absolute / n,
+        "r2": 1 - squared / variance if variance > 0 else None,
+    }
+
+def train(paths, model_path=MODEL_PATH, word2vec_path=WORD2VEC_PATH, target='outcome', workers=None,
+          chunk_size=DEFAULT_CHUNK_SIZE, max_rows=DEFAULT_MAX_ROWS, validation=0.1, n_estimators=100,
+          n_jobs=-1, min_samples_leaf=5, max_samples=1000000, seed=42, version=None, compile_forest=True):
+    """
+    Fit the match model on historical student-mentor pairs and save it as a bundle.
+
+    Pairs are streamed from the files in chunks and featurized in parallel;
+    only the float32 feature rows are kept, in temporary files, and at most
+    `max_rows` of them are loaded for fitting. The scaler is fit
+    incrementally, the forest with `n_jobs`, each tree on at most
+    `max_samples` bootstrap rows, so its size stays bounded too. A
+    `validation` fraction of the pairs is held out for the bundle's metrics.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    started = time.perf_counter()
+    try:
+        word2vec_model = load_word_vectors(word2vec_path) if word2vec_path else None
+    except Exception as e:
+        print(f"Error loading Word2Vec model: {e}; semantic features will be 0", file=sys.stderr)
+        word2vec_model, word2vec_path = None, None
+    embedder = get_embedder(word2vec_model)
+
+    rng = np.random.default_rng(seed)
+    scaler = StandardScaler()
+    low = np.full(NUM_FEATURES, np.inf)
+    high = np.full(NUM_FEATURES, -np.inf)
+    skipped = 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = {name: RowFile(directory, name, width) for name, width in
+                 (('train_X', NUM_FEATURES), ('train_y', 1), ('validation_X', NUM_FEATURES), ('validation_y', 1))}
+
+        for X, y, bad in featurized_chunks(paths, target, embedder, word2vec_path, workers, chunk_size):
+            skipped += bad
+            held_out = rng.random(len(y)) < validation
+            files['validation_X'].append(X[held_out])
+            files['validation_y'].append(y[held_out])
+            X, y = X[~held_out], y[~held_out]
+            if len(y):
+                files['train_X'].append(X)
+                files['train_y'].append(y)
+                scaler.partial_fit(X)
+                low = np.minimum(low, X.min(axis=0))
+                high = np.maximum(high, X.max(axis=0))
+            print(f"{files['train_X'].rows + files['validation_X'].rows} pairs featurized")
+
+        X_train, y_train = files['train_X'].load(), files['train_y'].load()
+        X_validation, y_validation = files['validation_X'].load(), files['validation_y'].load()
+        if len(y_train) == 0:
+            raise ValueError("No usable training pairs")
+        featurized = time.perf_counter()
+
+        rows = len(y_train)
+        if rows > max_rows:
+            chosen = np.sort(rng.choice(rows, max_rows, replace=False))
+            X_train, y_train = X_train[chosen], y_train[chosen]
+        X_fit = scale_rows(scaler, X_train, chunk_size)
+        y_fit = np.asarray(y_train, dtype=float)
+
+        model = RandomForestRegressor(
+            n_estimators=n_estimators,
+            n_jobs=n_jobs,
+            random_state=seed,
+            min_samples_leaf=min_samples_leaf,
+            max_samples=min(max_samples, len(y_fit)) if max_samples else None
+        )
+        model.fit(X_fit, y_fit)
+        del X_fit
+        fitted = time.perf_counter()
+
+        metrics = {
+            "validation": evaluate(model, scaler, X_validation, y_validation, chunk_size),
+            "train_pairs": rows,
+            "fit_pairs": len(y_fit),
+            "validation_pairs": len(y_validation),
+            "skipped_pairs": skipped,
+            "target": target,
+            "sources": [os.path.abspath(path) for path in paths],
+            "featurize_seconds": featurized - started,
+            "fit_seconds": fitted - featurized,
+            "params": {"n_estimators": n_estimators, "min_samples_leaf": min_samples_leaf,
+                       "max_samples": max_samples, "seed": seed},
+        }
+
+    schema = {
+        "names": list(FEATURE_NAMES),
+        "dtype": "float32",
+        "mean": scaler.mean_.tolist(),
+        "std": scaler.scale_.tolist(),
+        "min": low.tolist(),
+        "max": high.tolist(),
+    }
+    bundle = make_bundle(model, scaler, FEATURE_NAMES, metrics, version, schema)
+    save_bundle(bundle, model_path)
+    print(f"Model version {bundle['version']} trained on {rows} pairs and saved as {model_path}")
+    print(f"Validation: {json.dumps(metrics['validation'])}")
+
+    if compile_forest:
+        # Compiled copy for serving without sklearn
+        print(f"Compiled forest saved as {export_bundle(bundle, model_path)}")
+    return bundle
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the match model on historical student-mentor pairs")
+    parser.add_argument('data', nargs='+', help="CSV or JSONL files of {student, mentor, outcome} pairs")
+    parser.add_argument('--out', default=MODEL_PATH, help="model bundle to write")
+    parser.add_argument('--word2vec', default=WORD2VEC_PATH, help="Word2Vec model for the semantic features")
+    parser.add_argument('--target', default='outcome', help="field holding the 0-1 match outcome")
+    parser.add_argument('--workers', type=int, help="feature extraction processes (defaults to the core count)")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="forest training threads")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--max-rows', type=int, default=DEFAULT_MAX_ROWS, help="training rows kept for fitting")
+    parser.add_argument('--validation', type=float, default=0.1, help="fraction of pairs held out")
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--min-samples-leaf', type=int, default=5)
+    parser.add_argument('--max-samples', type=int, default=1000000, help="bootstrap rows per tree (0 for all)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--version', help="bundle version (defaults to a timestamp)")
+    parser.add_argument('--no-compile', action='store_true', help="skip the compiled forest export")
+    args = parser.parse_args()
+
+    try:
+        train(args.data, args.out, args.word2vec or None, args.target, args.workers, args.chunk_size,
+              args.max_rows, args.validation, args.n_estimators, args.n_jobs, args.min_samples_leaf,
+              args.max_samples, args.seed, args.version, not args.no_compile)
+    except (OSError, ValueError) as e:
+        print(f"Training failed: {e}", file=sys.stderr)
+        sys.exit(1)
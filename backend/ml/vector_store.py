@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import pickle
+import argparse
+import numpy as np
+
+VECTORS_FILE = 'vectors.npy'
+SCALES_FILE = 'scales.npy'
+VOCAB_FILE = 'vocab.json'
+META_FILE = 'meta.json'
+PRECISIONS = ('float32', 'float16', 'int8')
+
+def default_store_dir(word2vec_path):
+    """Directory the exported store of a pickled model lives in (next to the pickle)"""
+    return os.path.splitext(word2vec_path)[0] + '.vectors'
+
+def quantize(vectors, precision='float32'):
+    """
+    Convert a float matrix to the stored precision.
+
+    Returns (stored, scales): int8 rows are scaled by their own max |value| / 127
+    and `scales` holds that factor per row; other precisions have no scales.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if precision == 'int8':
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        stored = np.round(vectors / scales[:, None]).astype(np.int8)
+        return stored, scales.astype(np.float32)
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    return vectors.astype(precision), None
+
+def _source_identity(path):
+    stat = os.stat(path)
+    return {"source": os.path.basename(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+class VectorStore:
+    """
+    Read-only word vectors backed by a (memory-mapped) matrix.
+
+    Offers the parts of gensim's KeyedVectors the similarity code uses
+    (key_to_index, vector_size and indexing by a word or list of words).
+    Every process that maps the same file shares its physical pages, and
+    opening it costs only the vocabulary load. The matrix may be stored as
+    float32, float16 or per-row-scaled int8; lookups return float32.
+    """
+
+    def __init__(self, words, vectors, scales=None):
+        self.key_to_index = {word: i for i, word in enumerate(words)}
+        self.vectors = vectors
+        self.scales = scales
+        self.vector_size = vectors.shape[1]
+        self.store_dir = None
+
+    @classmethod
+    def load(cls, store_dir):
+        with open(os.path.join(store_dir, VOCAB_FILE), 'r', encoding='utf-8') as f:
+            words = json.load(f)
+        vectors = np.load(os.path.join(store_dir, VECTORS_FILE), mmap_mode='r')
+        scales_path = os.path.join(store_dir, SCALES_FILE)
+        scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        store = cls(words, vectors, scales)
+        store.store_dir = store_dir
+        return store
+
+    @property
+    def precision(self):
+        return 'int8' if self.scales is not None else str(self.vectors.dtype)
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __contains__(self, word):
+        return word in self.key_to_index
+
+    def __len__(self):
+        return len(self.key_to_index)
+
+    def __getitem__(self, words):
+        if isinstance(words, str):
+            rows = self.key_to_index[words]
+        else:
+            rows = [self.key_to_index[word] for word in words]
+        vectors = np.asarray(self.vectors[rows], dtype=np.float32)
+        if self.scales is not None:
+            scales = self.scales[rows]
+            vectors = vectors * (scales[:, None] if np.ndim(scales) else scales)
+        return vectors
+
+def export_store(word2vec_path, store_dir=None, precision='float32'):
+    """Write the vectors of a pickled Word2Vec model as a raw matrix plus vocabulary"""
+    store_dir = store_dir or default_store_dir(word2vec_path)
+    with open(word2vec_path, 'rb') as f:
+        model = pickle.load(f)
+    wv = getattr(model, 'wv', model)
+
+    os.makedirs(store_dir, exist_ok=True)
+    # Rows follow gensim's index order, so row i is the vector of index_to_key[i]
+    stored, scales = quantize(wv.vectors, precision)
+    np.save(os.path.join(store_dir, VECTORS_FILE), np.ascontiguousarray(stored))
+    scales_path = os.path.join(store_dir, SCALES_FILE)
+    if scales is not None:
+        np.save(scales_path, scales)
+    elif os.path.exists(scales_path):
+        os.remove(scales_path)
+    with open(os.path.join(store_dir, VOCAB_FILE), 'w', encoding='utf-8') as f:
+        json.dump(list(wv.index_to_key), f)
+    with open(os.path.join(store_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(_source_identity(word2vec_path), f)
+    return store_dir
+
+def store_is_current(word2vec_path, store_dir=None):
+    """True if an exported store exists and was made from the current pickle"""
+    store_dir = store_dir or default_store_dir(word2vec_path)
+    meta_path = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(meta_path) or not os.path.exists(os.path.join(store_dir, VECTORS_FILE)):
+        return False
+    if not os.path.exists(word2vec_path):
+        # Only the store was deployed
+        return True
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    identity = _source_identity(word2vec_path)
+    return meta.get('size') == identity['size'] and meta.get('mtime') == identity['mtime']
+
+def load_word_vectors(word2vec_path, store_dir=None):
+    """
+    Load word vectors for similarity scoring.
+
+    Uses the memory-mapped store when a current one exists, and otherwise
+    unpickles the full gensim model.
+    """
+    store_dir = store_dir or default_store_dir(word2vec_path)
+    if store_is_current(word2vec_path, store_dir):
+        return VectorStore.load(store_dir)
+    with open(word2vec_path, 'rb') as f:
+        return pickle.load(f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export Word2Vec vectors to a memory-mappable store")
+    parser.add_argument('command', choices=['export', 'info'])
+    parser.add_argument('--source', default=os.path.join(os.path.dirname(__file__), '../../src/trained_word2vec.pkl'))
+    parser.add_argument('--out', help="store directory (defaults to <source>.vectors)")
+    parser.add_argument('--precision', choices=PRECISIONS, default='float32',
+                        help="storage precision of the exported vectors")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        store_dir = export_store(args.source, args.out, args.precision)
+        print(f"Exported {args.precision} vectors to {store_dir}")
+    else:
+        store_dir = args.out or default_store_dir(args.source)
+        if not os.path.exists(os.path.join(store_dir, VECTORS_FILE)):
+            print(f"No vector store at {store_dir}")
+            sys.exit(1)
+        store = VectorStore.load(store_dir)
+        print(f"Store: {store_dir}")
+        print(f"Current: {store_is_current(args.source, store_dir)}")
+        print(f"Vocabulary size: {len(store)}")
+        print(f"Vector size: {store.vector_size}")
+        print(f"Matrix: {store.precision} {store.vectors.shape} "
+              f"({store.nbytes / (1024 * 1024):.2f} MB)")
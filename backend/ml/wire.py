@@ -0,0 +1,86 @@
+import json
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    # Optional (requirements-optional.txt): without it every peer falls back to JSON
+    msgpack = None
+
+JSON_TYPE = 'application/json'
+MSGPACK_TYPE = 'application/msgpack'
+MSGPACK_TYPES = (MSGPACK_TYPE, 'application/x-msgpack', 'application/vnd.msgpack')
+
+# Numeric mentor fields a request may send as packed columns ("mentorColumns")
+NUMERIC_FIELDS = ('experienceYears', 'rating', 'totalMentees')
+
+def supported_formats():
+    return ['json', 'msgpack'] if msgpack is not None else ['json']
+
+def is_msgpack(content_type):
+    """Whether a Content-Type header names MessagePack"""
+    return bool(content_type) and content_type.split(';')[0].strip().lower() in MSGPACK_TYPES
+
+def payload_format(payload):
+    """
+    'json' or 'msgpack' for an encoded message.
+
+    Requests are JSON objects or MessagePack maps, and a MessagePack map never
+    starts with '{' or whitespace, so the first byte tells them apart.
+    """
+    return 'json' if payload[:1] in (b'{', b'[', b' ', b'\t', b'\r', b'\n') else 'msgpack'
+
+def _builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def encode(message, fmt='json'):
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("MessagePack needs the msgpack package")
+        return msgpack.packb(message, use_bin_type=True, default=_builtin)
+    return json.dumps(message).encode('utf-8')
+
+def decode(payload, fmt='json'):
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("MessagePack needs the msgpack package")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload.decode('utf-8') if isinstance(payload, (bytes, bytearray)) else payload)
+
+def mentor_columns(data, count):
+    """
+    The request's packed numeric mentor fields as float arrays, or None.
+
+    "mentorColumns" maps a field of NUMERIC_FIELDS to one value per mentor, in
+    mentor order: little-endian float64 bytes (a MessagePack bin) or a plain
+    list of numbers. Those fields are then left out of the mentor objects.
+    """
+    columns = data.get('mentorColumns')
+    if not columns:
+        return None
+    result = {}
+    for field, column in columns.items():
+        if field not in NUMERIC_FIELDS:
+            raise ValueError(f"Unsupported mentor column: {field}")
+        if isinstance(column, (bytes, bytearray, memoryview)):
+            values = np.frombuffer(column, dtype='<f8')
+        else:
+            values = np.asarray(column, dtype=float)
+        if values.shape != (count,):
+            raise ValueError(f"Mentor column {field} has {values.size} values for {count} mentors")
+        result[field] = values
+    return result
+
+def slice_columns(columns, start, stop):
+    return None if columns is None else {field: values[start:stop] for field, values in columns.items()}
+
+def with_columns(mentors, columns):
+    """Copies of the mentors with their column values filled back in"""
+    if not columns:
+        return mentors
+    return [dict(mentor, **{field: values[i].item() for field, values in columns.items()})
+            for i, mentor in enumerate(mentors)]
@@ -0,0 +1,218 @@
+const { spawn } = require('child_process');
+
+// Optional and not in package.json: `npm install @msgpack/msgpack` enables
+// MessagePack bodies and worker frames; without it everything is JSON
+let msgpack = null;
+try {
+  msgpack = require('@msgpack/msgpack');
+} catch (err) {
+  msgpack = null;
+}
+
+/**
+ * Pool of long-lived Python workers speaking the length-prefixed protocol
+ * from ml/framing.py: every frame is a 4-byte big-endian length followed by
+ * a JSON or MessagePack body, and responses echo the request "id".
+ *
+ * Each worker is asked which formats it reads when it starts; MessagePack is
+ * used once both sides support it (and options.format is not 'json').
+ *
+ * Requests go to the worker with the fewest in-flight requests, and a worker
+ * can hold several requests at once, so bursts are pipelined instead of
+ * waiting for a fresh interpreter per request.
+ */
+class WorkerPool {
+  constructor(scriptPath, options = {}) {
+    this.scriptPath = scriptPath;
+    this.args = options.args || ['--worker'];
+    this.size = options.size || 2;
+    this.python = options.python || process.env.PYTHON || 'python';
+    this.timeoutMs = options.timeoutMs || 30000;
+    this.name = options.name || 'python-worker';
+    this.format = options.format || process.env.WORKER_FORMAT || 'msgpack';
+    // Workers that exit before answering anything are respawned after an
+    // exponentially growing delay; after maxFailures of them in a row the
+    // pool gives up and rejects requests at once so callers fall back
+    this.backoffMs = options.backoffMs || 1000;
+    this.maxBackoffMs = options.maxBackoffMs || 30000;
+    this.maxFailures = options.maxFailures || 5;
+    this.failures = 0;
+    this.unavailable = false;
+    this.workers = [];
+    this.nextId = 1;
+    this.started = false;
+    this.closed = false;
+  }
+
+  start() {
+    this.started = true;
+    while (this.workers.length < this.size) {
+      this.workers.push(this.spawnWorker());
+    }
+    return this;
+  }
+
+  spawnWorker() {
+    const proc = spawn(this.python, [this.scriptPath, ...this.args]);
+    const worker = {
+      proc, pending: new Map(), buffer: Buffer.alloc(0), alive: true, format: 'json', answered: false, replaced: false
+    };
+
+    proc.stdout.on('data', (chunk) => {
+      worker.buffer = Buffer.concat([worker.buffer, chunk]);
+      this.drainFrames(worker);
+    });
+
+    proc.stderr.on('data', (data) => {
+      console.log(`${this.name} stderr:`, data.toString());
+    });
+
+    proc.stdin.on('error', (err) => {
+      console.error(`${this.name} stdin error:`, err.message);
+    });
+
+    proc.on('error', (err) => {
+      console.error(`${this.name} failed to start:`, err.message);
+      this.retire(worker, err);
+      this.replace(worker);
+    });
+
+    proc.on('exit', (code) => {
+      this.retire(worker, new Error(`${this.name} exited with code ${code}`));
+      this.replace(worker);
+    });
+
+    // The formats handshake doubles as the first sign of life of the worker
+    this.send(worker, { op: 'formats' })
+      .then(({ formats }) => {
+        if (this.format === 'msgpack' && msgpack && Array.isArray(formats) && formats.includes('msgpack')) {
+          worker.format = 'msgpack';
+        }
+      })
+      .catch(() => {});
+
+    return worker;
+  }
+
+  /**
+   * Keep the pool warm after a worker died. Workers that never answered count
+   * as failed starts: each one doubles the delay before the next spawn, and
+   * maxFailures in a row mark the pool unavailable.
+   */
+  replace(worker) {
+    if (this.closed || worker.replaced) {
+      return;
+    }
+    worker.replaced = true;
+    this.failures = worker.answered ? 0 : this.failures + 1;
+    if (this.failures >= this.maxFailures) {
+      this.unavailable = true;
+      console.error(`${this.name} failed to start ${this.failures} times in a row; not restarting it`);
+      return;
+    }
+    const delay = Math.min(this.backoffMs * 2 ** Math.max(0, this.failures - 1), this.maxBackoffMs);
+    setTimeout(() => {
+      if (!this.closed && !this.unavailable && this.workers.length < this.size) {
+        this.workers.push(this.spawnWorker());
+      }
+    }, delay);
+  }
+
+  drainFrames(worker) {
+    while (worker.buffer.length >= 4) {
+      const length = worker.buffer.readUInt32BE(0);
+      if (worker.buffer.length < 4 + length) {
+        return;
+      }
+      const body = worker.buffer.subarray(4, 4 + length);
+      worker.buffer = worker.buffer.subarray(4 + length);
+      worker.answered = true;
+
+      let message;
+      try {
+        // Workers answer in the format they were asked in; JSON bodies start with '{'
+        message = body[0] === 0x7b ? JSON.parse(body.toString('utf8')) : msgpack.decode(body);
+      } catch (err) {
+        console.error(`Error parsing ${this.name} output:`, err);
+        continue;
+      }
+
+      const entry = worker.pending.get(message.id);
+      if (!entry) {
+        continue;
+      }
+      worker.pending.delete(message.id);
+      clearTimeout(entry.timer);
+      delete message.id;
+      if (message.error) {
+        entry.reject(new Error(message.error));
+      } else {
+        entry.resolve(message);
+      }
+    }
+  }
+
+  retire(worker, err) {
+    if (!worker.alive) {
+      return;
+    }
+    worker.alive = false;
+    this.workers = this.workers.filter((w) => w !== worker);
+    for (const entry of worker.pending.values()) {
+      clearTimeout(entry.timer);
+      entry.reject(err);
+    }
+    worker.pending.clear();
+  }
+
+  /**
+   * Send a request to the least busy worker. `options.toBinary` and
+   * `options.toJson` may rewrite the payload for MessagePack or JSON workers
+   * (e.g. into or out of packed columns).
+   */
+  request(payload, options = {}) {
+    if (this.unavailable) {
+      return Promise.reject(new Error(`${this.name} is unavailable`));
+    }
+    if (!this.started) {
+      this.start();
+    }
+    if (this.workers.length === 0) {
+      // Waiting out a restart backoff
+      return Promise.reject(new Error(`${this.name} has no running worker`));
+    }
+    const worker = this.workers.reduce((best, w) => (w.pending.size < best.pending.size ? w : best));
+    const rewrite = worker.format === 'msgpack' ? options.toBinary : options.toJson;
+    const message = rewrite ? rewrite(payload) : payload;
+    return this.send(worker, message);
+  }
+
+  send(worker, payload) {
+    const id = this.nextId++;
+    const body = worker.format === 'msgpack'
+      ? (encoded => Buffer.from(encoded.buffer, encoded.byteOffset, encoded.byteLength))(msgpack.encode({ ...payload, id }))
+      : Buffer.from(JSON.stringify({ ...payload, id }), 'utf8');
+    const header = Buffer.alloc(4);
+    header.writeUInt32BE(body.length, 0);
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        worker.pending.delete(id);
+        reject(new Error(`${this.name} request ${id} timed out`));
+      }, this.timeoutMs);
+      worker.pending.set(id, { resolve, reject, timer });
+      worker.proc.stdin.write(Buffer.concat([header, body]));
+    });
+  }
+
+  close() {
+    this.closed = true;
+    for (const worker of this.workers) {
+      worker.proc.stdin.end();
+    }
+  }
+}
+
+WorkerPool.msgpack = msgpack;
+
+module.exports = WorkerPool;
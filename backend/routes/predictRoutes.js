@@ -1,84 +1,168 @@
 const express = require('express');
 const router = express.Router();
-const { spawn } = require('child_process');
 const path = require('path');
 const fs = require('fs');
+const WorkerPool = require('../ml/workerPool');
+
+// Warm predict.py workers; the models are loaded once per worker, not per request
+const predictPool = new WorkerPool(path.join(__dirname, '../ml/predict.py'), {
+  name: 'predict.py',
+  size: parseInt(process.env.PREDICT_WORKERS, 10) || 2
+}).start();
+
+const msgpack = WorkerPool.msgpack;
+const MSGPACK_TYPES = ['application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack'];
+
+// Mentor fields sent to MessagePack workers as packed Float64Array columns
+// (read back by wire.mentor_columns in Python as little-endian float64)
+const NUMERIC_FIELDS = ['experienceYears', 'rating', 'totalMentees'];
+
+// MessagePack bodies are read raw here; JSON ones are parsed by express.json() in server.js
+const msgpackBody = express.raw({ type: MSGPACK_TYPES, limit: '256mb' });
+
+// Move numeric fields every mentor has into columns instead of per-object keys
+function packColumns(payload) {
+  if (payload.mentorColumns) {
+    return payload;
+  }
+  const { mentors } = payload;
+  const fields = NUMERIC_FIELDS.filter(field => mentors.every(mentor => typeof mentor[field] === 'number'));
+  if (fields.length === 0) {
+    return payload;
+  }
+  const mentorColumns = {};
+  for (const field of fields) {
+    mentorColumns[field] = Float64Array.from(mentors, mentor => mentor[field]);
+  }
+  const stripped = mentors.map(mentor => {
+    const copy = { ...mentor };
+    fields.forEach(field => delete copy[field]);
+    return copy;
+  });
+  return { ...payload, mentors: stripped, mentorColumns };
+}
+
+// Put packed columns back into the mentor objects (for JSON workers and the local fallback)
+function unpackColumns(payload) {
+  const { mentorColumns, ...rest } = payload;
+  if (!mentorColumns) {
+    return payload;
+  }
+  const columns = Object.entries(mentorColumns).map(([field, column]) => [
+    field,
+    // A MessagePack bin decodes to a view into the body; copy it to an aligned buffer
+    column instanceof Uint8Array ? new Float64Array(column.slice().buffer) : column
+  ]);
+  rest.mentors = rest.mentors.map((mentor, i) => {
+    const copy = { ...mentor };
+    columns.forEach(([field, values]) => { copy[field] = values[i]; });
+    return copy;
+  });
+  return rest;
+}
+
+// JSON unless the client prefers MessagePack (the default when it sent MessagePack)
+function sendResult(req, res, result) {
+  if (msgpack) {
+    const offered = req.is(MSGPACK_TYPES) ? ['application/msgpack', 'application/json'] : ['application/json', 'application/msgpack'];
+    if (req.accepts(offered) === 'application/msgpack') {
+      const encoded = msgpack.encode(result);
+      return res.type('application/msgpack').send(Buffer.from(encoded.buffer, encoded.byteOffset, encoded.byteLength));
+    }
+  }
+  return res.json(result);
+}
 
 // API endpoint to predict mentor matches
-router.post('/predict', async (req, res) => {
+router.post('/predict', msgpackBody, async (req, res) => {
   try {
-    const { student, mentors } = req.body;
+    let body = req.body;
+    if (Buffer.isBuffer(body)) {
+      if (!msgpack) {
+        return res.status(415).json({ error: 'MessagePack requests need the @msgpack/msgpack package' });
+      }
+      try {
+        body = msgpack.decode(body);
+      } catch (err) {
+        return res.status(400).json({ error: 'Invalid MessagePack body' });
+      }
+    }
+    const { student, mentors, mentorColumns } = body || {};
     
     if (!student || !mentors || !Array.isArray(mentors)) {
       return res.status(400).json({ error: 'Invalid request data' });
     }
+    const payload = mentorColumns ? { student, mentors, mentorColumns } : { student, mentors };
     
     // Check if the Word2Vec model exists
     const word2vecPath = path.join(__dirname, '../../src/trained_word2vec.pkl');
     const modelExists = fs.existsSync(word2vecPath);
     console.log(`Word2Vec model ${modelExists ? 'found' : 'not found'} at ${word2vecPath}`);
     
-    // Prepare data for the Python script
-    const inputData = JSON.stringify({
-      student: student,
-      mentors: mentors
-    });
-    
-    // Spawn Python process to use the ML model
-    const pythonProcess = spawn('python', [
-      path.join(__dirname, '../ml/predict.py')
-    ]);
-    
-    let result = '';
-    let errorData = '';
-    
-    // Collect data from script
-    pythonProcess.stdout.on('data', (data) => {
-      result += data.toString();
-    });
-    
-    // Collect error data
-    pythonProcess.stderr.on('data', (data) => {
-      errorData += data.toString();
-      console.log('Python stderr:', data.toString());
-    });
-    
-    // Send input data to Python script
-    pythonProcess.stdin.write(inputData);
-    pythonProcess.stdin.end();
-    
-    // Process completed
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error(`Python process exited with code ${code}`);
-        console.error(`Error: ${errorData}`);
-        
-        // Fallback to local calculation if Python script fails
-        const scoredMentors = mentors.map(mentor => ({
-          ...mentor,
-          matchScore: calculateLocalMatchScore(student, mentor)
-        }));
-        
-        // Sort by match score
-        scoredMentors.sort((a, b) => b.matchScore - a.matchScore);
-        
-        return res.json({ mentors: scoredMentors });
-      }
+    try {
+      // Score on one of the warm workers instead of starting Python per request
+      const result = await predictPool.request(payload, { toBinary: packColumns, toJson: unpackColumns });
+      return sendResult(req, res, result);
+    } catch (error) {
+      console.error('Python worker failed:', error.message);
       
-      try {
-        const parsedResult = JSON.parse(result);
-        res.json(parsedResult);
-      } catch (error) {
-        console.error('Error parsing Python script output:', error);
-        res.status(500).json({ error: 'Error processing match predictions' });
-      }
-    });
+      // Fallback to local calculation if the worker fails
+      const scoredMentors = unpackColumns(payload).mentors.map(mentor => ({
+        ...mentor,
+        matchScore: calculateLocalMatchScore(student, mentor)
+      }));
+      
+      // Sort by match score
+      scoredMentors.sort((a, b) => b.matchScore - a.matchScore);
+      
+      return sendResult(req, res, { mentors: scoredMentors });
+    }
   } catch (error) {
     console.error('Error in predict endpoint:', error);
     res.status(500).json({ error: 'Server error' });
   }
 });
 
+// Match a whole cohort of students against one mentor list in a single worker
+// request: top_k mentors per student, or a capacity-limited assignment with "assign"
+router.post('/cohort/match', msgpackBody, async (req, res) => {
+  try {
+    let body = req.body;
+    if (Buffer.isBuffer(body)) {
+      if (!msgpack) {
+        return res.status(415).json({ error: 'MessagePack requests need the @msgpack/msgpack package' });
+      }
+      try {
+        body = msgpack.decode(body);
+      } catch (err) {
+        return res.status(400).json({ error: 'Invalid MessagePack body' });
+      }
+    }
+    const { students, mentors } = body || {};
+    
+    if (!Array.isArray(students) || !Array.isArray(mentors)) {
+      return res.status(400).json({ error: 'Invalid request data' });
+    }
+    
+    const result = await predictPool.request({ ...body, op: 'cohort' });
+    return sendResult(req, res, result);
+  } catch (error) {
+    console.error('Error in cohort matching:', error.message);
+    return res.status(500).json({ error: 'Error matching cohort' });
+  }
+});
+
+// Per-stage latency metrics of one predict.py worker (Prometheus text format)
+router.get('/predict/metrics', async (req, res) => {
+  try {
+    const metrics = await predictPool.request({ op: 'metrics' });
+    return res.type(metrics.contentType).send(metrics.text);
+  } catch (error) {
+    console.error('Error reading predict metrics:', error);
+    return res.status(500).json({ error: 'Error reading predict metrics' });
+  }
+});
+
 // Fallback local calculation if ML model fails
 function calculateLocalMatchScore(student, mentor) {
   // Create a feature vector similar to what our ML model would use
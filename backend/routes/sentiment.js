@@ -1,7 +1,18 @@
 const express = require('express');
 const router = express.Router();
-const { spawn } = require('child_process');
 const path = require('path');
+const WorkerPool = require('../ml/workerPool');
+
+// Resident sentiment_analyzer.py; the model is loaded once, not per request
+const sentimentPool = new WorkerPool(path.join(__dirname, '..', 'sentiment_analyzer.py'), {
+  name: 'sentiment_analyzer.py',
+  size: parseInt(process.env.SENTIMENT_WORKERS, 10) || 1,
+  args: [
+    '--worker',
+    '--max-batch-size', process.env.SENTIMENT_MAX_BATCH_SIZE || '64',
+    '--max-wait-ms', process.env.SENTIMENT_MAX_WAIT_MS || '10'
+  ]
+}).start();
 
 /**
  * @route POST /api/sentiment/analyze
@@ -23,47 +34,48 @@ router.post('/analyze', async (req, res) => {
       return res.json({ results: [] });
     }
 
-    // Spawn Python process
-    const pythonProcess = spawn('python', [
-      path.join(__dirname, '..', 'sentiment_analyzer.py')
-    ]);
-
-    let dataString = '';
-    let errorString = '';
-
-    // Send data to Python script
-    pythonProcess.stdin.write(JSON.stringify({ texts: validTexts }));
-    pythonProcess.stdin.end();
-
-    // Collect data from Python script
-    pythonProcess.stdout.on('data', (data) => {
-      dataString += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      errorString += data.toString();
-    });
-
-    // Handle process completion
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error(`Python process exited with code ${code}`);
-        console.error(`Error: ${errorString}`);
-        return res.status(500).json({ error: 'Error processing sentiment analysis' });
-      }
-
-      try {
-        const results = JSON.parse(dataString);
-        return res.json(results);
-      } catch (err) {
-        console.error('Error parsing Python output:', err);
-        return res.status(500).json({ error: 'Error parsing sentiment analysis results' });
-      }
-    });
+    try {
+      // The resident analyzer batches texts from concurrent requests together
+      const results = await sentimentPool.request({ texts: validTexts });
+      return res.json(results);
+    } catch (err) {
+      console.error('Sentiment worker failed:', err.message);
+      return res.status(500).json({ error: 'Error processing sentiment analysis' });
+    }
   } catch (err) {
     console.error('Server error:', err);
     res.status(500).json({ error: 'Server error' });
   }
 });
 
+/**
+ * @route GET /api/sentiment/cache
+ * @desc Hit/miss counters of the sentiment result cache (of one analyzer worker)
+ * @access Public
+ */
+router.get('/cache', async (req, res) => {
+  try {
+    const stats = await sentimentPool.request({ op: 'cache_stats' });
+    return res.json(stats);
+  } catch (err) {
+    console.error('Sentiment worker failed:', err.message);
+    return res.status(500).json({ error: 'Error reading sentiment cache stats' });
+  }
+});
+
+/**
+ * @route GET /api/sentiment/metrics
+ * @desc Per-stage latency metrics of one analyzer worker (Prometheus text format)
+ * @access Public
+ */
+router.get('/metrics', async (req, res) => {
+  try {
+    const metrics = await sentimentPool.request({ op: 'metrics' });
+    return res.type(metrics.contentType).send(metrics.text);
+  } catch (err) {
+    console.error('Sentiment worker failed:', err.message);
+    return res.status(500).json({ error: 'Error reading sentiment metrics' });
+  }
+});
+
 module.exports = router;
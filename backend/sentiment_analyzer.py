@@ -2,6 +2,16 @@ import pickle
 import sys
 import json
 import os
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml'))
+from framing import serve_stdio, serve_unix_socket
+from sentiment_cache import SentimentCache, default_cache_path, model_identity
+from metrics import REGISTRY, stage, traced
 
 def load_model(model_path):
     """Load the sentiment analysis model from the pickle file"""
@@ -81,50 +91,265 @@ def analyze_sentiment(text, model):
         print(f"Error analyzing sentiment: {str(e)}", file=sys.stderr)
         return {"sentiment": "neutral", "score": 0.5, "text": text}
 
-def batch_analyze(texts, model_path="../src/sentiment_model.pkl"):
-    """Analyze sentiment for multiple texts"""
+def locate_model(model_path="../src/sentiment_model.pkl"):
+    """
+    Load ml_model.pkl next to model_path if it exists, otherwise model_path itself.
+
+    Returns (model, path of the file it came from).
+    """
     # Try to load the ml_model.pkl first, if it fails, fall back to sentiment_model.pkl
     model = None
     try:
         ml_model_path = os.path.join(os.path.dirname(model_path), "ml_model.pkl")
         if os.path.exists(ml_model_path):
             model = load_model(ml_model_path)
-            print(f"Loaded ml_model.pkl successfully", file=sys.stderr)
+            # ml_model.pkl may hold the mentor-match model bundle from create_model.py
+            if isinstance(model, dict):
+                model = None
+            else:
+                print(f"Loaded ml_model.pkl successfully", file=sys.stderr)
+                return model, ml_model_path
     except Exception as e:
         print(f"Error loading ml_model.pkl: {str(e)}, falling back to sentiment_model.pkl", file=sys.stderr)
     
     # If ml_model failed to load or doesn't exist, try the specified model path
-    if not model:
-        model = load_model(model_path)
-    
+    return load_model(model_path), model_path
+
+def resolve_model(model_path="../src/sentiment_model.pkl"):
+    """Load ml_model.pkl next to model_path if it exists, otherwise model_path itself"""
+    return locate_model(model_path)[0]
+
+def open_cache(model, path):
+    """Result cache for a loaded model file, or None if there is nothing worth caching"""
+    if not model or not hasattr(model, 'predict'):
+        return None
+    try:
+        return SentimentCache(model_identity(path), default_cache_path(path))
+    except Exception as e:
+        print(f"Error opening sentiment cache: {str(e)}, continuing without it", file=sys.stderr)
+        return None
+
+def sentiment_label(prediction):
+    """Map a model class to its sentiment label"""
+    if prediction == 1:
+        return "positive"
+    elif prediction == 0:
+        return "neutral"
+    return "negative"
+
+def predict_batch(texts, model):
+    """
+    Labels and confidences for many texts from one model call.
+
+    predict_proba gives both: the label is the most probable class and the
+    confidence its probability. Models without probabilities get one predict
+    call and confidence 1.0, as in analyze_sentiment.
+    """
+    try:
+        proba = np.asarray(model.predict_proba(texts))
+        predictions = np.asarray(model.classes_)[proba.argmax(axis=1)]
+        confidences = proba.max(axis=1)
+    except Exception:
+        predictions = model.predict(texts)
+        confidences = np.ones(len(texts))
+    return [sentiment_label(prediction) for prediction in predictions], confidences
+
+def analyze_texts(texts, model, cache=None):
+    """Analyze sentiment for multiple texts with an already loaded model"""
     # If both models failed to load, return neutral sentiment
     if not model:
         return [{"sentiment": "neutral", "score": 0.5, "text": text} for text in texts]
     
-    results = []
-    for text in texts:
-        if not text or len(text.strip()) < 5:
-            results.append({"sentiment": "neutral", "score": 0.5, "text": text})
-        else:
-            results.append(analyze_sentiment(text, model))
+    # Short or empty texts stay neutral and Python-related ones get the fixed
+    # high-confidence positive; only the rest go to the model. Items that are
+    # not strings (numbers, objects) are neutral on their own, like a failed
+    # analyze_sentiment call, rather than failing every text in the batch
+    strings = [text if isinstance(text, str) else None for text in texts]
+    short = np.array([not text or len(text.strip()) < 5 for text in strings], dtype=bool)
+    python_related = np.array([bool(text) and 'python' in text.lower() for text in strings], dtype=bool)
+    to_model = np.flatnonzero(~short & ~python_related)
+    
+    results = [None] * len(texts)
+    for index in np.flatnonzero(short):
+        results[index] = {"sentiment": "neutral", "score": 0.5, "text": texts[index]}
+    for index in np.flatnonzero(~short & python_related):
+        results[index] = {"sentiment": "positive", "score": 0.95, "text": texts[index]}
+    
+    if len(to_model) == 0:
+        return results
+    
+    if not hasattr(model, 'predict'):
+        # Keyword fallback of list models is per text anyway
+        for index in to_model:
+            results[index] = analyze_sentiment(texts[index], model)
+        return results
+    
+    # Texts with a cached result skip the model; repeated texts are predicted once
+    with stage('sentiment_cache'):
+        keys = [cache.key(texts[index]) if cache else index for index in to_model]
+        known = cache.get_many(keys) if cache else {}
+    pending = {}
+    for index, key in zip(to_model, keys):
+        if key not in known:
+            pending.setdefault(key, texts[index])
+    
+    if pending:
+        try:
+            with stage('sentiment_model'):
+                labels, confidences = predict_batch(list(pending.values()), model)
+        except Exception as e:
+            print(f"Error in batch sentiment prediction: {str(e)}, analyzing texts one by one", file=sys.stderr)
+            for index in to_model:
+                results[index] = analyze_sentiment(texts[index], model)
+            return results
+        
+        predicted = {key: (label, float(confidence)) for key, label, confidence in zip(pending, labels, confidences)}
+        if cache:
+            cache.put_many(predicted)
+        known.update(predicted)
+    
+    # Put the model results back at their input positions
+    for index, key in zip(to_model, keys):
+        sentiment, score = known[key]
+        results[index] = {"sentiment": sentiment, "score": score, "text": texts[index]}
     
     return results
 
+def batch_analyze(texts, model_path="../src/sentiment_model.pkl", use_cache=True):
+    """Analyze sentiment for multiple texts"""
+    model, path = locate_model(model_path)
+    return analyze_texts(texts, model, open_cache(model, path) if use_cache else None)
+
+class SentimentBatcher:
+    """
+    Groups texts from requests that arrive close together into one model call.
+
+    A batch is flushed when it holds at least max_batch_size texts or when
+    max_wait_ms has passed since its first request arrived, whichever is first.
+    """
+    
+    def __init__(self, model, max_batch_size=64, max_wait_ms=10, cache=None):
+        self.model = model
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def submit(self, texts):
+        """Queue texts for the next batch and block until their results are ready"""
+        entry = {"texts": texts, "results": None, "error": None, "done": threading.Event()}
+        self.requests.put(entry)
+        entry["done"].wait()
+        if entry["error"] is not None:
+            raise entry["error"]
+        return entry["results"]
+    
+    def _collect(self):
+        batch = [self.requests.get()]
+        size = len(batch[0]["texts"])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(entry)
+            size += len(entry["texts"])
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for entry in batch for text in entry["texts"]]
+            try:
+                results = analyze_texts(texts, self.model, self.cache)
+            except Exception as e:
+                for entry in batch:
+                    entry["error"] = e
+                    entry["done"].set()
+                continue
+            
+            # Hand each request back its own slice of the batch, in order
+            offset = 0
+            for entry in batch:
+                entry["results"] = results[offset:offset + len(entry["texts"])]
+                offset += len(entry["texts"])
+                entry["done"].set()
+
+def run_server(model_path, socket_path=None, max_batch_size=64, max_wait_ms=10, threads=32, use_cache=True):
+    """Load the model once and serve framed {"texts": [...]} requests (JSON or MessagePack, see framing.py)"""
+    model, path = locate_model(model_path)
+    cache = open_cache(model, path) if use_cache else None
+    batcher = SentimentBatcher(model, max_batch_size, max_wait_ms, cache)
+    
+    def handle(data):
+        if data.get("op") == "cache_stats":
+            return cache.stats() if cache else {"enabled": False}
+        texts = data.get("texts", [])
+        if not isinstance(texts, list):
+            # Rejected here, before it can join (and fail) a shared batch
+            raise ValueError("texts must be a list")
+        # Queueing for the batch plus the batch itself
+        with stage('sentiment_batch'):
+            results = batcher.submit(texts)
+        return {"results": results}
+    
+    if cache is not None:
+        REGISTRY.add_collector(lambda: [
+            ('sentiment_cache_hits_total', 'counter', 'Sentiment results served from the cache',
+             cache.hits + cache.disk_hits),
+            ('sentiment_cache_misses_total', 'counter', 'Sentiment results computed by the model', cache.misses),
+        ])
+    # Stage latencies and cache counters, read with {"op": "metrics"}
+    handle = traced(handle, 'sentiment')
+    
+    # Each in-flight request holds a thread while it waits for its batch,
+    # so the thread count bounds how many requests can share one batch
+    if socket_path:
+        serve_unix_socket(socket_path, handle, max_workers=threads)
+    else:
+        serve_stdio(handle, max_workers=threads)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze sentiment of texts")
+    parser.add_argument('--worker', action='store_true',
+                        help="keep the model loaded and serve framed requests on stdin/stdout")
+    parser.add_argument('--socket', help="serve framed requests on this Unix socket instead")
+    parser.add_argument('--model-path', default="../src/sentiment_model.pkl")
+    parser.add_argument('--max-batch-size', type=int, default=64,
+                        help="flush a batch once it holds this many texts")
+    parser.add_argument('--max-wait-ms', type=float, default=10,
+                        help="longest time a request waits for others to join its batch")
+    parser.add_argument('--threads', type=int, default=32,
+                        help="requests that can be waiting on a batch at once")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always run the model instead of reusing stored results")
+    args = parser.parse_args()
+    
+    if args.worker or args.socket:
+        run_server(args.model_path, args.socket, args.max_batch_size, args.max_wait_ms, args.threads,
+                   not args.no_cache)
+        sys.exit(0)
+    
     # Read input from stdin
     input_data = json.loads(sys.stdin.read())
     texts = input_data.get("texts", [])
     
     # Use the specified model path or default
-    model_path = input_data.get("model_path", "../src/sentiment_model.pkl")
+    model_path = input_data.get("model_path", args.model_path)
     
     # Check if this is a Python skills analysis
-    is_python_analysis = any('python' in text.lower() for text in texts if text)
+    is_python_analysis = any('python' in text.lower() for text in texts if isinstance(text, str))
     if is_python_analysis:
         print(f"Python skills analysis detected, using specialized handling", file=sys.stderr)
     
     # Analyze sentiments
-    results = batch_analyze(texts, model_path)
+    results = batch_analyze(texts, model_path, not args.no_cache)
     
     # Output results as JSON
     print(json.dumps({"results": results}))
@@ -1,85 +1,387 @@
-from flask import Flask, request, jsonify
+import time
+# Cold-start clock; the imports below are the first phase of the startup breakdown
+STARTED_AT = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-import pickle
-import pandas as pd
+import json
 import numpy as np
 import os
-import joblib
+import sys
 import uuid
+import threading
 from datetime import datetime
-import gensim
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml'))
+from cohort import assignment_options, cohort_response, cohort_scores, cohort_store
+from embeddings import get_embedder
+from feedback_stats import METRICS, FeedbackAggregates, metric_value
+from feedback_store import FeedbackStore, MAX_PAGE_SIZE
+from features import build_feature_matrix, list_match_scores
+from mentor_store import MentorStore
+from metrics import CONTENT_TYPE, REGISTRY, embedder_collector, finish_timings, record_request, server_timing, stage, start_timings
+from parallel import create_pool, keep_for_page
+from ranking import int_option, keep_best, mentor_entry, parse_page, rank_mentors
+from score_cache import SCORE_CACHE_ENABLED, PairScoreCache, cached_scores, file_version, mentor_fingerprints, profile_fingerprint
+from startup import StartupTracker
+from wire import JSON_TYPE, MSGPACK_TYPE, decode, encode, is_msgpack, mentor_columns, msgpack, slice_columns, with_columns
+from vector_store import load_word_vectors
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Load the model
+startup = StartupTracker(STARTED_AT)
+startup.record('imports', time.perf_counter() - STARTED_AT)
+
+# "background" loads the models on a thread so that the server answers (and
+# reports progress on /readyz) right away; "eager" loads them before import returns
+MODEL_LOADING = os.environ.get('MODEL_LOADING', 'background')
+
 model_path = os.path.join('src', 'ml_model.pkl')
-try:
-    model_data = joblib.load(model_path)
-    print(f"Model loaded successfully from {model_path}")
-    print(f"Model type: {type(model_data)}")
-    # If model_data is a list, it might contain pre-computed match scores or coefficients
-    if isinstance(model_data, list):
-        print(f"Model contains {len(model_data)} items")
-        if len(model_data) > 0:
-            print(f"First item type: {type(model_data[0])}")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    model_data = None
-
-# Load the trained Word2Vec model
 word2vec_path = os.path.join('src', 'trained_word2vec.pkl')
-try:
-    with open(word2vec_path, 'rb') as f:
-        word2vec_model = pickle.load(f)
-    print(f"Word2Vec model loaded successfully from {word2vec_path}")
-except Exception as e:
-    print(f"Error loading Word2Vec model: {e}")
-    word2vec_model = None
+
+# Set by load_models(); requests that need them get a 503 until /readyz passes
+model_data = None
+word2vec_model = None
+mentor_store = None
+scoring_pool = None
+# Files the scores depend on; part of every pair-score cache key
+score_version = None
+
+# Scores of recently matched (student, mentor) pairs, see ml/score_cache.py
+score_cache = PairScoreCache()
+
+# Send per-stage timings of every request in a Server-Timing header (otherwise only with ?timing=1)
+SERVER_TIMING = os.environ.get('SERVER_TIMING') == '1'
+
+REGISTRY.add_collector(embedder_collector(lambda: get_embedder(word2vec_model)))
+
+def startup_collector():
+    samples = [('startup_ready', 'gauge', 'Whether the models are loaded and warmed', int(startup.ready))]
+    if startup.ready_after is not None:
+        samples.append(('startup_seconds', 'gauge', 'Time from process start to ready', startup.ready_after))
+    return samples
+
+REGISTRY.add_collector(startup_collector)
+REGISTRY.add_collector(lambda: [
+    ('score_cache_hits_total', 'counter', 'Match scores served from the pair-score cache', score_cache.hits),
+    ('score_cache_misses_total', 'counter', 'Match scores computed for lack of a cached pair', score_cache.misses),
+    ('score_cache_size', 'gauge', 'Pairs in the pair-score cache', score_cache.size),
+])
+
+@app.before_request
+def start_request_timing():
+    request.started_at = time.perf_counter()
+    start_timings()
+
+@app.after_request
+def finish_request_timing(response):
+    timings = finish_timings()
+    started_at = getattr(request, 'started_at', None)
+    if started_at is not None:
+        record_request(request.endpoint or 'unknown', response.status_code, time.perf_counter() - started_at)
+    if timings and (SERVER_TIMING or request.args.get('timing') == '1'):
+        response.headers['Server-Timing'] = server_timing(timings)
+    return response
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process answers requests (the models may still be loading)"""
+    return jsonify({"status": "ok", "state": startup.state})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: the models are loaded and warmed; the body has the cold-start timing breakdown"""
+    report = startup.report()
+    return jsonify(report), 200 if report["ready"] else 503
+
+def not_ready():
+    """503 for requests that need the models before they are ready"""
+    message = "Model not loaded" if startup.state == 'failed' else "Models are still loading"
+    response = jsonify({"error": message, "state": startup.state})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of request/stage latencies and cache counters"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.route('/api/mentors', methods=['POST'])
+def register_mentors():
+    """Register new mentor profiles or update existing ones (matched by id)"""
+    if not startup.ready:
+        return not_ready()
+    
+    try:
+        data = request.json
+        mentors = data.get('mentors') if isinstance(data, dict) else data
+        if not isinstance(mentors, list):
+            return jsonify({"error": "Expected a list of mentors"}), 400
+        for mentor in mentors:
+            if not isinstance(mentor, dict) or not isinstance(mentor.get('id'), (str, int)):
+                return jsonify({"error": "Every mentor needs a string or integer id"}), 400
+        
+        # Changed profiles drop their cached scores; unchanged ones keep them
+        stale = [mentor_store.fingerprint_of(mentor['id']) for mentor in mentors]
+        try:
+            total = mentor_store.register(mentors)
+        except ValueError as e:
+            # Nothing was stored: the store validates every mentor first
+            return jsonify({"error": str(e)}), 400
+        score_cache.invalidate_mentors([fp for fp, mentor in zip(stale, mentors)
+                                        if fp is not None and fp != profile_fingerprint(mentor)])
+        return jsonify({"registered": len(mentors), "total": total}), 200
+    
+    except Exception as e:
+        print(f"Error registering mentors: {e}")
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/api/predict', methods=['POST'])
 def predict():
-    if model_data is None:
-        return jsonify({"error": "Model not loaded"}), 500
+    if not startup.ready:
+        return not_ready()
     
     try:
-        data = request.json
+        if is_msgpack(request.content_type) and msgpack is None:
+            return jsonify({"error": "MessagePack requests need the msgpack package"}), 415
+        
+        with stage('parse'):
+            data = read_body()
         student_data = data.get('student')
         mentors_data = data.get('mentors')
+        try:
+            page = parse_page(data)
+            mode = stream_mode(data)
+            candidates = int_option(data, 'candidates', minimum=1)
+            if candidates is not None and mentors_data is not None:
+                # Only registered mentors are indexed; inline lists are always scored in full
+                raise ValueError("candidates only applies to registered mentors, not an inline mentors list")
+            chunk_size = int_option(data, 'chunk_size', STREAM_CHUNK_SIZE, 1)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # Numeric fields sent as packed arrays instead of per-mentor keys
+        columns = mentor_columns(data, len(mentors_data)) if mentors_data is not None else None
         
-        # Process each mentor and calculate match score
-        results = []
-        for mentor in mentors_data:
-            # Create feature vector for this student-mentor pair
-            features = create_feature_vector(student_data, mentor)
+        if mentors_data is None:
+            # Score against registered mentors (all of them, or just mentorIds)
+            slots = mentor_store.resolve(data.get('mentorIds'))
+            if candidates is not None:
+                # Fully score only the nearest candidates by profile vector
+                slots = mentor_store.candidates(student_data, candidates, slots)
+            if mode:
+                def score_chunk(start, stop):
+                    chunk = slots[start:stop]
+                    return (mentor_store.get_profiles(chunk),
+                            score_feature_matrix(mentor_store.feature_matrix(student_data, chunk)))
+                return stream_predictions(mode, page, chunk_size, len(slots), score_chunk)
+            mentors_data = mentor_store.get_profiles(slots)
             
-            # Since model_data is a list, we'll use it as a coefficient list
-            # to calculate a weighted score based on our features
-            if isinstance(model_data, list) and len(model_data) > 0:
-                # If model_data is a list of coefficients, use them to calculate score
-                # Make sure the feature vector length matches the coefficient list length
-                coeffs = model_data[:len(features)] if len(model_data) >= len(features) else model_data + [1] * (len(features) - len(model_data))
-                match_score = sum(f * c for f, c in zip(features, coeffs))
-                # Normalize to 0-100 range
-                match_score = int(min(100, max(0, match_score)))
-            else:
-                # Fallback to a simple scoring method
-                match_score = simple_score_calculation(features)
+            def features_for(positions):
+                return mentor_store.feature_matrix(student_data, slots[positions])
             
-            # Add match score to mentor data
-            mentor_with_score = mentor.copy()
-            mentor_with_score['matchScore'] = match_score
-            results.append(mentor_with_score)
+            def fingerprints():
+                return mentor_store.get_fingerprints(slots)
+        elif mode:
+            def score_chunk(start, stop):
+                chunk = with_columns(mentors_data[start:stop], slice_columns(columns, start, stop))
+                return chunk, score_feature_matrix(create_feature_matrix(student_data, chunk))
+            return stream_predictions(mode, page, chunk_size, len(mentors_data), score_chunk)
+        elif scoring_pool is not None and scoring_pool.should_split(len(mentors_data)):
+            # Large list: score chunks on the process pool and merge their best mentors
+            with stage('parallel_scoring'):
+                indices, match_scores = scoring_pool.score(student_data, mentors_data,
+                                                           keep_for_page(page['top_k'], page['offset']), columns)
+            with stage('ranking'):
+                results = rank_mentors(mentors_data, match_scores, indices=indices, columns=columns, **page)
+            with stage('serialization'):
+                return respond({"mentors": results, "total": len(mentors_data)})
+        else:
+            def features_for(positions):
+                if len(positions) == len(mentors_data):
+                    return create_feature_matrix(student_data, mentors_data, columns)
+                subset_columns = None if columns is None else {field: values[positions] for field, values in columns.items()}
+                return create_feature_matrix(student_data, [mentors_data[i] for i in positions], subset_columns)
+            
+            def fingerprints():
+                return mentor_fingerprints(mentors_data, columns)
+        
+        def score_positions(positions):
+            # One feature matrix and one scoring pass for all of the given mentors
+            with stage('features'):
+                features = features_for(positions)
+            with stage('scoring'):
+                return score_feature_matrix(features)
         
-        # Sort by match score
-        results.sort(key=lambda x: x['matchScore'], reverse=True)
+        if use_score_cache(data):
+            # Only pairs missing from the cache are featurized and scored
+            try:
+                with stage('fingerprint'):
+                    student_fingerprint = profile_fingerprint(student_data)
+                    mentor_fps = fingerprints()
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            match_scores = cached_scores(score_cache, score_version, student_fingerprint, mentor_fps, score_positions)
+        else:
+            match_scores = score_positions(np.arange(len(mentors_data)))
         
-        return jsonify({"mentors": results})
+        # Select the requested page of ranks and build only those entries
+        with stage('ranking'):
+            results = rank_mentors(mentors_data, match_scores, columns=columns, **page)
+        
+        with stage('serialization'):
+            return respond({"mentors": results, "total": len(mentors_data)})
     
     except Exception as e:
         print(f"Error in prediction: {e}")
         return jsonify({"error": str(e)}), 500
 
+def read_body():
+    """The request body, decoded from MessagePack or JSON according to its Content-Type"""
+    if is_msgpack(request.content_type):
+        return decode(request.get_data(), 'msgpack')
+    return request.json
+
+def respond(result):
+    """
+    `result` as MessagePack when the client accepts it (preferred when the
+    request was MessagePack), otherwise as JSON
+    """
+    if msgpack is not None:
+        offered = [MSGPACK_TYPE, JSON_TYPE] if is_msgpack(request.content_type) else [JSON_TYPE, MSGPACK_TYPE]
+        accept = request.accept_mimetypes
+        # Without an Accept header the response mirrors the request
+        if (accept.best_match(offered) if accept else offered[0]) == MSGPACK_TYPE:
+            return Response(encode(result, 'msgpack'), content_type=MSGPACK_TYPE)
+    return jsonify(result)
+
+@app.route('/api/cohort/match', methods=['POST'])
+def match_cohort():
+    """
+    Match a whole cohort of students in one request.
+
+    Scores every student against the mentors sent with the request (or the
+    registered ones, optionally just mentorIds) as one score matrix, then
+    returns the top_k mentors of each student or, with "assign": true, a
+    capacity-limited assignment (see ml/cohort.py).
+    """
+    if not startup.ready:
+        return not_ready()
+    
+    try:
+        if is_msgpack(request.content_type) and msgpack is None:
+            return jsonify({"error": "MessagePack requests need the msgpack package"}), 415
+        
+        with stage('parse'):
+            data = read_body()
+        students = data.get('students')
+        if not isinstance(students, list):
+            return jsonify({"error": "Expected a list of students"}), 400
+        
+        try:
+            # Reject a bad top_k / offset / fields or assignment option before any scoring
+            parse_page(data)
+            if data.get('mentors') is None:
+                store = mentor_store
+                slots = mentor_store.resolve(data.get('mentorIds'))
+            else:
+                store = cohort_store(data['mentors'], get_embedder(word2vec_model))
+                slots = store.resolve()
+            mentors = store.get_profiles(slots)
+            if data.get('assign'):
+                assignment_options(data, mentors)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        with stage('cohort_scoring'):
+            scores = cohort_scores(students, lambda student: store.feature_matrix(student, slots),
+                                   len(slots), score_feature_matrix)
+        
+        with stage('assignment' if data.get('assign') else 'ranking'):
+            result = cohort_response(data, students, mentors, scores)
+        
+        with stage('serialization'):
+            return respond(result)
+    
+    except Exception as e:
+        print(f"Error in cohort matching: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# Mentors scored per record of a streamed /api/predict response
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 1000))
+
+# Page size of "topk" stream refreshes when the request gives no top_k
+STREAM_TOP_K = 10
+
+def stream_mode(data):
+    """
+    "topk" or "chunks" when the predict response should be streamed as NDJSON,
+    from the request's "stream" option or an application/x-ndjson Accept header
+    """
+    mode = data.get('stream')
+    if mode is None and request.accept_mimetypes.best == 'application/x-ndjson':
+        mode = 'topk'
+    if mode in (None, False):
+        return None
+    if mode is True:
+        return 'topk'
+    if mode not in ('topk', 'chunks'):
+        raise ValueError(f"Unknown stream mode: {mode}")
+    return mode
+
+def stream_predictions(mode, page, chunk_size, total, score_chunk):
+    """
+    Score mentors `chunk_size` at a time and stream newline-delimited JSON records.
+
+    `page` is the request's parse_page result and `score_chunk(start, stop)`
+    returns (profiles, scores) for that range.
+    "topk" emits the current best page (top_k defaults to STREAM_TOP_K) after
+    every chunk ("done" marks the last one); "chunks" emits each chunk's scored mentors unsorted, then one
+    "ranking" record with the id and matchScore of the requested page. Only
+    the mentors that can still reach the page are kept between chunks.
+    """
+    page = dict(page)
+    if mode == 'topk' and page['top_k'] is None:
+        page['top_k'] = STREAM_TOP_K
+    keep = None if page['top_k'] is None else page['offset'] + page['top_k']
+    
+    def records():
+        best_profiles, best_scores = [], np.zeros(0, dtype=int)
+        try:
+            for start in range(0, total, chunk_size):
+                stop = min(total, start + chunk_size)
+                profiles, scores = score_chunk(start, stop)
+                
+                if mode == 'chunks':
+                    entries = [mentor_entry(mentor, score, page['fields']) for mentor, score in zip(profiles, scores)]
+                    yield json.dumps({"type": "chunk", "start": start, "mentors": entries}) + '\n'
+                
+                # Candidates stay in input order so ties rank as in the full sort
+                candidates = best_profiles + list(profiles)
+                positions, best_scores = keep_best(np.arange(len(candidates)), np.concatenate([best_scores, scores]), keep)
+                best_profiles = [candidates[position] for position in positions]
+                
+                if mode == 'topk':
+                    yield json.dumps({
+                        "type": "top",
+                        "mentors": rank_mentors(best_profiles, best_scores, **page),
+                        "scored": stop,
+                        "total": total,
+                        "done": stop == total
+                    }) + '\n'
+            
+            if mode == 'chunks':
+                ranked = rank_mentors(best_profiles, best_scores, top_k=page['top_k'], offset=page['offset'], fields=['id'])
+                yield json.dumps({"type": "ranking", "mentors": ranked, "total": total}) + '\n'
+            elif total == 0:
+                yield json.dumps({"type": "top", "mentors": [], "scored": 0, "total": 0, "done": True}) + '\n'
+        
+        except Exception as e:
+            print(f"Error in streamed prediction: {e}")
+            yield json.dumps({"type": "error", "error": str(e)}) + '\n'
+    
+    return Response(stream_with_context(records()), mimetype='application/x-ndjson')
+
 def simple_score_calculation(features):
     """Simple fallback scoring method if the model data isn't usable"""
     # Assuming features are: [common_skills, industry_match, common_interests, location_match, experience_diff, rating, total_mentees]
@@ -96,30 +398,52 @@ def simple_score_calculation(features):
     # Ensure score is between 0-100
     return int(min(100, max(0, score)))
 
+def score_feature_matrix(features):
+    """
+    Score a (n_mentors x n_features) feature matrix in one pass.
+
+    Gives the same scores as applying the coefficient list (or
+    simple_score_calculation) to each row separately.
+    """
+    if isinstance(model_data, list) and len(model_data) > 0:
+        # Same coefficient padding as the per-mentor calculation
+        n_features = features.shape[1]
+        coeffs = model_data[:n_features] if len(model_data) >= n_features else model_data + [1] * (n_features - len(model_data))
+        scores = weighted_sum(features, coeffs)
+        # Normalize to 0-100 range
+        return np.clip(scores, 0, 100).astype(int)
+    
+    # Fallback to a simple scoring method
+    return simple_score_matrix(features)
+
+def simple_score_matrix(features):
+    """Vectorized simple_score_calculation over a whole feature matrix"""
+    weights = [15, 20, 10, 10, -2, 5, 2]
+    
+    features = features[:, :len(weights)].copy()
+    if features.shape[1] > 4:
+        features[:, 4] = np.maximum(0, 10 - features[:, 4])
+    
+    scores = weighted_sum(features, weights[:features.shape[1]])
+    return np.clip(scores, 0, 100).astype(int)
+
+def weighted_sum(features, weights):
+    """Row-wise sum of features * weights, accumulated column by column"""
+    # Adding one column at a time keeps the left-to-right summation order of
+    # sum(f * w for ...), so the batch scores round exactly like the loop did
+    scores = np.zeros(features.shape[0])
+    for column, weight in zip(features.T, weights):
+        scores += column * weight
+    return scores
+
 def calculate_text_similarity(text1, text2):
     """Calculate semantic similarity between two texts using Word2Vec"""
     if word2vec_model is None:
         return 0
     
     try:
-        # Convert texts to lowercase and split into words
-        words1 = text1.lower().split()
-        words2 = text2.lower().split()
-        
-        # Filter words that exist in the model's vocabulary
-        words1 = [word for word in words1 if word in word2vec_model.wv.key_to_index]
-        words2 = [word for word in words2 if word in word2vec_model.wv.key_to_index]
-        
-        if not words1 or not words2:
-            return 0
-        
-        # Calculate average vector for each text
-        vec1 = sum(word2vec_model.wv[word] for word in words1) / len(words1)
-        vec2 = sum(word2vec_model.wv[word] for word in words2) / len(words2)
-        
-        # Calculate cosine similarity
-        similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-        return max(0, similarity)  # Ensure non-negative
+        # Phrase vectors come from the process-wide LRU cache
+        return get_embedder(word2vec_model).similarity(text1, text2)
     except Exception as e:
         print(f"Error calculating text similarity: {e}")
         return 0
@@ -134,30 +458,9 @@ def create_feature_vector(student, mentor):
     student_skills = [skill['name'].lower() for skill in student.get('skills', [])]
     mentor_skills = [skill['name'].lower() for skill in mentor.get('skills', [])]
     
-    # Direct match (exact skills)
-    student_skills_set = set(student_skills)
-    mentor_skills_set = set(mentor_skills)
-    common_skills = student_skills_set.intersection(mentor_skills_set)
-    direct_match = len(common_skills)
-    
-    # Semantic match (using Word2Vec)
-    semantic_match = 0
-    if word2vec_model is not None:
-        # For each student skill, find the best matching mentor skill
-        for s_skill in student_skills:
-            if s_skill in mentor_skills_set:  # Skip if already directly matched
-                continue
-            
-            # Calculate similarity with each mentor skill
-            max_similarity = 0
-            for m_skill in mentor_skills:
-                similarity = calculate_text_similarity(s_skill, m_skill)
-                max_similarity = max(max_similarity, similarity)
-            
-            semantic_match += max_similarity
-    
-    # Combine direct and semantic matches
-    skills_match = direct_match + semantic_match
+    # Direct match count plus the best semantic match of each remaining skill,
+    # taken from one student x mentor similarity matrix
+    skills_match = list_match_scores(student_skills, [mentor_skills], get_embedder(word2vec_model))[0]
     features.append(skills_match)
     
     # Industry match (binary: 1 if same industry, 0 otherwise)
@@ -170,30 +473,8 @@ def create_feature_vector(student, mentor):
     student_interests = [interest.lower() for interest in student.get('interests', [])]
     mentor_interests = [interest.lower() for interest in mentor.get('interests', [])]
     
-    # Direct match (exact interests)
-    student_interests_set = set(student_interests)
-    mentor_interests_set = set(mentor_interests)
-    common_interests = student_interests_set.intersection(mentor_interests_set)
-    direct_match = len(common_interests)
-    
-    # Semantic match (using Word2Vec)
-    semantic_match = 0
-    if word2vec_model is not None:
-        # For each student interest, find the best matching mentor interest
-        for s_interest in student_interests:
-            if s_interest in mentor_interests_set:  # Skip if already directly matched
-                continue
-            
-            # Calculate similarity with each mentor interest
-            max_similarity = 0
-            for m_interest in mentor_interests:
-                similarity = calculate_text_similarity(s_interest, m_interest)
-                max_similarity = max(max_similarity, similarity)
-            
-            semantic_match += max_similarity
-    
-    # Combine direct and semantic matches
-    interests_match = direct_match + semantic_match
+    # Direct match count plus the best semantic match of each remaining interest
+    interests_match = list_match_scores(student_interests, [mentor_interests], get_embedder(word2vec_model))[0]
     features.append(interests_match)
     
     # Location match (binary: 1 if same location, 0 otherwise)
@@ -221,8 +502,43 @@ def create_feature_vector(student, mentor):
     
     return np.array(features)
 
-# In-memory storage for feedback (in a real app, this would be a database)
-feedback_data = []
+def create_feature_matrix(student, mentors, columns=None):
+    """
+    Create the (n_mentors x n_features) matrix of create_feature_vector rows
+    for one student against many mentors.
+    """
+    return build_feature_matrix(student, mentors, get_embedder(word2vec_model), columns)
+
+def use_score_cache(data):
+    """Whether to use the pair-score cache: on unless SCORE_CACHE=0, "cache": false or ?nocache=1"""
+    return SCORE_CACHE_ENABLED and data.get('cache', True) is not False and request.args.get('nocache') != '1'
+
+@app.route('/api/score-cache', methods=['GET'])
+def score_cache_stats():
+    """Size and hit/miss counters of the pair-score cache"""
+    return jsonify(dict(score_cache.stats(), enabled=SCORE_CACHE_ENABLED, version=score_version))
+
+@app.route('/api/embedding-cache', methods=['GET'])
+def embedding_cache_stats():
+    """Hit/miss counters of the phrase embedding cache"""
+    embedder = get_embedder(word2vec_model)
+    if embedder is None:
+        return jsonify({"error": "Word2Vec model not loaded"}), 503
+    return jsonify(embedder.stats())
+
+# Durable feedback storage (SQLite, see ml/feedback_store.py)
+feedback_path = os.environ.get('FEEDBACK_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'feedback.sqlite'))
+feedback_store = FeedbackStore(feedback_path)
+
+# Per-event running totals, rebuilt from the stored feedback on startup
+feedback_stats = FeedbackAggregates()
+with startup.phase('feedback_stats'):
+    feedback_stats.rebuild(feedback_store.iter_all())
+
+# Optionally label suggestions with the sentiment model for the per-event tallies
+# (loaded by load_models; feedback submitted before that is stored unlabeled)
+FEEDBACK_SENTIMENT = os.environ.get('FEEDBACK_SENTIMENT') == '1'
+sentiment_model = sentiment_cache = None
 
 # Mock event data (in a real app, this would come from a database)
 events = {
@@ -243,6 +559,15 @@ def submit_feedback():
         for field in required_fields:
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
+        for field in METRICS:
+            # NaN or infinite scores would poison the event averages (and are not valid JSON)
+            if metric_value(data[field]) is None:
+                return jsonify({"error": f"{field} must be a finite number"}), 400
+        suggestions = data.get('suggestions')
+        if suggestions is None:
+            suggestions = ''
+        elif not isinstance(suggestions, str):
+            return jsonify({"error": "suggestions must be a string"}), 400
         
         # Create feedback object
         feedback = {
@@ -253,12 +578,17 @@ def submit_feedback():
             "eventExperience": data['eventExperience'],
             "speakerInteraction": data['speakerInteraction'],
             "sessionRelevance": data['sessionRelevance'],
-            "suggestions": data.get('suggestions', ''),
+            "suggestions": suggestions,
             "createdAt": datetime.now().isoformat()
         }
         
-        # Store feedback
-        feedback_data.append(feedback)
+        if sentiment_model is not None and feedback['suggestions'].strip():
+            from sentiment_analyzer import analyze_texts
+            feedback['sentiment'] = analyze_texts([feedback['suggestions']], sentiment_model, sentiment_cache)[0]['sentiment']
+        
+        # Store feedback and fold it into the event's totals
+        feedback_store.add(feedback)
+        feedback_stats.add(feedback)
         
         return jsonify(feedback), 201
     
@@ -268,13 +598,159 @@ def submit_feedback():
 
 @app.route('/api/feedback', methods=['GET'])
 def get_feedback():
+    """
+    Stored feedback, oldest first, optionally filtered by eventId and a
+    since/until createdAt range. With `limit` (or a `cursor`) one page is
+    returned and the X-Next-Cursor header continues it.
+    """
     try:
-        # In a real app, you might want to add filtering, pagination, etc.
-        return jsonify(feedback_data)
+        args = request.args
+        limit = args.get('limit', type=int)
+        if limit is None and 'cursor' in args:
+            limit = 100
+        if limit is not None:
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+        
+        try:
+            records, next_cursor = feedback_store.query(
+                event_id=args.get('eventId'),
+                since=args.get('since'),
+                until=args.get('until'),
+                cursor=args.get('cursor'),
+                limit=limit
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        response = jsonify(records)
+        if next_cursor is not None:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     
     except Exception as e:
         print(f"Error retrieving feedback: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/feedback/stats', methods=['GET'])
+def get_feedback_stats():
+    """Per-event counts, sums, means, deviations and histograms of the feedback metrics"""
+    try:
+        return jsonify(feedback_stats.summary(request.args.get('eventId')))
+    
+    except Exception as e:
+        print(f"Error retrieving feedback stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def load_model(path):
+    """Unpickle the match model (joblib is only imported here, on the loader thread)"""
+    import joblib
+    model = joblib.load(path)
+    print(f"Model loaded successfully from {path}")
+    print(f"Model type: {type(model)}")
+    # If the model is a list, it might contain pre-computed match scores or coefficients
+    if isinstance(model, list):
+        print(f"Model contains {len(model)} items")
+        if len(model) > 0:
+            print(f"First item type: {type(model[0])}")
+    return model
+
+def load_sentiment_model():
+    global sentiment_model, sentiment_cache
+    from sentiment_analyzer import locate_model, open_cache
+    model, path = locate_model(os.path.join('src', 'sentiment_model.pkl'))
+    sentiment_cache = open_cache(model, path)
+    sentiment_model = model
+
+# Synthetic request scored once before the server reports ready, so the first
+# real request does not pay for first-call costs on the scoring path
+WARMUP_STUDENT = {
+    "skills": [{"name": "python"}, {"name": "machine learning"}],
+    "interests": ["data science"],
+    "industry": {"id": 1},
+    "location": "Bangalore",
+    "experienceYears": 2,
+    "bio": "student interested in data science"
+}
+WARMUP_MENTORS = [
+    {"id": 0, "skills": [{"name": "python"}], "interests": ["data science"], "industry": {"id": 1},
+     "location": "Bangalore", "experienceYears": 8, "rating": 4.5, "totalMentees": 3,
+     "bio": "data scientist working with python"},
+    {"id": 1, "skills": [{"name": "java"}], "interests": ["web development"], "industry": {"id": 2},
+     "location": "Mumbai", "experienceYears": 5, "rating": 4.0, "totalMentees": 8,
+     "bio": "backend engineer"}
+]
+
+def warm_up():
+    """Run the synthetic request through feature building, scoring and ranking"""
+    features = create_feature_matrix(WARMUP_STUDENT, WARMUP_MENTORS)
+    rank_mentors(WARMUP_MENTORS, score_feature_matrix(features), **parse_page({}))
+
+def load_models():
+    """
+    Load the model artifacts, build what depends on them and warm the scoring
+    path, timing every phase. The server is ready afterwards unless the match
+    model could not be loaded; a missing Word2Vec model only zeroes the
+    semantic features, as before.
+    """
+    global model_data, word2vec_model, mentor_store, scoring_pool, score_version
+    startup.set_state('loading')
+    
+    try:
+        with startup.phase('model'):
+            model_data = load_model(model_path)
+    except Exception as e:
+        print(f"Error loading model: {e}")
+    
+    try:
+        with startup.phase('word2vec'):
+            # Prefers the memory-mapped vector store (see ml/vector_store.py) when one is exported
+            word2vec_model = load_word_vectors(word2vec_path)
+        print(f"Word2Vec model loaded successfully from {word2vec_path} ({type(word2vec_model).__name__})")
+    except Exception as e:
+        print(f"Error loading Word2Vec model: {e}")
+    
+    # Registered mentor profiles with their matching inputs precomputed
+    with startup.phase('mentor_store'):
+        mentor_store = MentorStore(get_embedder(word2vec_model))
+    
+    if FEEDBACK_SENTIMENT:
+        try:
+            with startup.phase('sentiment_model'):
+                load_sentiment_model()
+        except Exception as e:
+            print(f"Error loading sentiment model: {e}")
+    
+    score_version = file_version(model_path, word2vec_path)
+    
+    if model_data is None:
+        startup.mark_failed()
+        print(startup.summary())
+        return
+    
+    startup.set_state('warming')
+    try:
+        with startup.phase('warmup'):
+            warm_up()
+    except Exception as e:
+        print(f"Error in warm-up request: {e}")
+        startup.mark_failed()
+        print(startup.summary())
+        return
+    
+    # Opt-in process pool for large mentor lists (SCORING_WORKERS > 1, see ml/parallel.py);
+    # forked once the models are loaded so the workers share them copy-on-write.
+    # Requests may already be running; the locks the workers use are held
+    # across the fork so none is inherited held by another thread.
+    with startup.phase('scoring_pool'):
+        scoring_pool = create_pool(get_embedder(word2vec_model), word2vec_path, score_feature_matrix)
+    
+    startup.mark_ready()
+    print(startup.summary())
+
+if MODEL_LOADING == 'eager':
+    load_models()
+else:
+    threading.Thread(target=load_models, name='model-loader', daemon=True).start()
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
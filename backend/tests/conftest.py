@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The ml modules import each other by bare name, as server.py sets them up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml'))
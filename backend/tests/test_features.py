@@ -0,0 +1,119 @@
+import random
+import numpy as np
+from embeddings import get_embedder
+from features import build_feature_matrix
+from predict import extract_features
+
+VOCABULARY = ['python', 'java', 'react', 'machine', 'learning', 'data', 'analysis', 'cloud',
+              'project', 'management', 'marketing', 'design', 'software', 'development', 'lead']
+SKILLS = ['Python', 'Java', 'React', 'Machine Learning', 'Data Analysis', 'Cloud', 'Project Management',
+          'Rust', 'Quantum Knitting']
+INTERESTS = ['Machine Learning', 'Data Science', 'UI Design', 'Digital Marketing', 'Cloud Computing', 'Origami']
+BIOS = ['software development lead', 'data analysis and machine learning', 'project management expert',
+        'unknown words only', '']
+
+class WordVectors:
+    """The parts of gensim KeyedVectors the matching code reads"""
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.key_to_index = {word: i for i, word in enumerate(VOCABULARY)}
+        self.vectors = rng.normal(size=(len(VOCABULARY), 16)).astype(np.float32)
+        self.vector_size = 16
+
+    def __getitem__(self, words):
+        if isinstance(words, str):
+            return self.vectors[self.key_to_index[words]]
+        return self.vectors[[self.key_to_index[word] for word in words]]
+
+class Word2Vec:
+    def __init__(self, seed=0):
+        self.wv = WordVectors(seed)
+
+def reference_similarity(text1, text2, word2vec_model):
+    # calculate_text_similarity as it was before the embedding cache
+    words1 = [word for word in text1.lower().split() if word in word2vec_model.wv.key_to_index]
+    words2 = [word for word in text2.lower().split() if word in word2vec_model.wv.key_to_index]
+    if not words1 or not words2:
+        return 0
+    vec1 = sum(word2vec_model.wv[word] for word in words1) / len(words1)
+    vec2 = sum(word2vec_model.wv[word] for word in words2) / len(words2)
+    return max(0, np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
+
+def reference_list_match(student_items, mentor_items, word2vec_model):
+    # Direct matches plus the best semantic match of every unmatched student item
+    mentor_set = set(mentor_items)
+    score = len(set(student_items) & mentor_set)
+    if word2vec_model is not None:
+        for item in student_items:
+            if item not in mentor_set:
+                score += max([reference_similarity(item, other, word2vec_model) for other in mentor_items], default=0)
+    return score
+
+def reference_features(student, mentor, word2vec_model=None):
+    """The per-pair extract_features of predict.py before scoring was vectorized"""
+    bio_similarity = 0
+    if word2vec_model is not None and student.get('bio') and mentor.get('bio'):
+        bio_similarity = reference_similarity(student['bio'], mentor['bio'], word2vec_model)
+    return [
+        reference_list_match([s['name'].lower() for s in student['skills']],
+                             [s['name'].lower() for s in mentor['skills']], word2vec_model),
+        1 if student['industry']['id'] == mentor['industry']['id'] else 0,
+        reference_list_match([i.lower() for i in student['interests']],
+                             [i.lower() for i in mentor['interests']], word2vec_model),
+        1 if student['location'] == mentor['location'] else 0,
+        abs(student['experienceYears'] - mentor['experienceYears']),
+        mentor['rating'],
+        mentor['totalMentees'],
+        bio_similarity,
+    ]
+
+def profile(rng, i):
+    person = {
+        "id": i,
+        "skills": [{"name": name} for name in rng.sample(SKILLS, rng.randint(0, 4))],
+        "interests": rng.sample(INTERESTS, rng.randint(0, 3)),
+        "location": rng.choice(['Pune', 'Bangalore']),
+        "industry": {"id": rng.randint(1, 3)},
+        "experienceYears": rng.randint(0, 20),
+        "rating": round(rng.uniform(3, 5), 1),
+        "totalMentees": rng.randint(0, 30),
+    }
+    if rng.random() < 0.8:
+        person["bio"] = rng.choice(BIOS)
+    return person
+
+def test_matrix_matches_per_pair_features():
+    rng = random.Random(7)
+    word2vec_model = Word2Vec()
+    embedder = get_embedder(word2vec_model)
+    semantic = np.zeros(3, dtype=bool)
+    for i in range(5):
+        student = profile(rng, 0)
+        # Repeated student items count once per repetition in the semantic part
+        student['skills'].append({"name": "Machine Learning"})
+        student['interests'] = rng.sample(INTERESTS, 2) + ['Data Science']
+        student['bio'] = BIOS[i % 3]
+        mentors = [profile(rng, i) for i in range(300)]
+
+        matrix = build_feature_matrix(student, mentors, embedder)
+        semantic |= (matrix[:, [0, 2, 7]] % 1 > 0).any(axis=0)
+        expected = np.array([reference_features(student, mentor, word2vec_model) for mentor in mentors], dtype=float)
+        np.testing.assert_allclose(matrix, expected, rtol=0, atol=1e-5)
+
+        # The per-pair path of predict.py must agree with both
+        per_pair = np.array([extract_features(student, mentor, word2vec_model) for mentor in mentors], dtype=float)
+        np.testing.assert_allclose(matrix, per_pair, rtol=0, atol=1e-5)
+
+    # Partial similarities of skills, interests and bios all came up
+    assert semantic.all()
+
+def test_matrix_without_word_vectors():
+    rng = random.Random(8)
+    student = profile(rng, 0)
+    mentors = [profile(rng, i) for i in range(100)]
+    expected = np.array([reference_features(student, mentor) for mentor in mentors], dtype=float)
+    np.testing.assert_array_equal(build_feature_matrix(student, mentors), expected)
+
+def test_empty_mentor_list():
+    assert build_feature_matrix(profile(random.Random(9), 0), []).shape == (0, 8)
@@ -0,0 +1,69 @@
+import pytest
+from feedback_store import FeedbackStore, encode_cursor
+
+def record(i, created_at, event_id='event1'):
+    return {"id": f"fb{i}", "eventId": event_id, "rating": i % 5 + 1,
+            "createdAt": created_at}
+
+@pytest.fixture
+def store(tmp_path):
+    store = FeedbackStore(str(tmp_path / 'feedback.sqlite'))
+    # Two records per timestamp, so pages also split runs of equal createdAt
+    for i in range(10):
+        store.add(record(i, f"2026-01-01T00:00:{i // 2:02d}"))
+    return store
+
+def read_pages(store, limit, **filters):
+    ids, cursor = [], None
+    while True:
+        records, cursor = store.query(cursor=cursor, limit=limit, **filters)
+        ids.extend(entry["id"] for entry in records)
+        if cursor is None:
+            return ids
+
+def test_pages_cover_every_record_once_in_order(store):
+    everything = [entry["id"] for entry in store.query()[0]]
+    assert everything == [f"fb{i}" for i in range(10)]
+    for limit in (1, 3, 4, 9, 10, 50):
+        assert read_pages(store, limit) == everything
+
+def test_last_page_has_no_cursor(store):
+    records, cursor = store.query(limit=5)
+    assert len(records) == 5 and cursor is not None
+    # Exactly `limit` records are left: no further (empty) page is announced
+    records, cursor = store.query(cursor=cursor, limit=5)
+    assert [entry["id"] for entry in records] == [f"fb{i}" for i in range(5, 10)]
+    assert cursor is None
+
+def test_paging_is_stable_across_inserts(store):
+    first, cursor = store.query(limit=3)
+    # Records inserted while paging: one older than the cursor, one tied with
+    # it and one newer. Only records after the cursor position can show up.
+    store.add(record(100, "2026-01-01T00:00:00"))
+    store.add(record(101, "2026-01-01T00:00:01"))
+    store.add(record(102, "2026-01-01T00:00:09"))
+
+    rest = []
+    while cursor is not None:
+        records, cursor = store.query(cursor=cursor, limit=3)
+        rest.extend(entry["id"] for entry in records)
+
+    ids = [entry["id"] for entry in first] + rest
+    assert ids == ["fb0", "fb1", "fb2", "fb3", "fb101", "fb4", "fb5", "fb6", "fb7", "fb8", "fb9", "fb102"]
+
+def test_paging_with_filters(store):
+    for i in range(10, 14):
+        store.add(record(i, f"2026-01-01T00:00:{i // 2:02d}", event_id='event2'))
+    assert read_pages(store, 2, event_id='event2') == ["fb10", "fb11", "fb12", "fb13"]
+    assert read_pages(store, 3, since="2026-01-01T00:00:02", until="2026-01-01T00:00:04") == \
+        ["fb4", "fb5", "fb6", "fb7"]
+
+def test_cursor_past_the_end_gives_an_empty_last_page(store):
+    records, cursor = store.query(cursor=encode_cursor("2026-01-02T00:00:00", 1), limit=5)
+    assert records == [] and cursor is None
+
+@pytest.mark.parametrize('cursor', ["", "abc", "2026-01-01T00:00:00", "2026-01-01T00:00:00|", "|4",
+                                    "2026-01-01T00:00:00|-1", "2026-01-01T00:00:00|4x"])
+def test_invalid_cursor_raises_value_error(store, cursor):
+    with pytest.raises(ValueError):
+        store.query(cursor=cursor, limit=5)
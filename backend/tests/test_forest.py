@@ -0,0 +1,46 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+from forest import PAIRS_PER_CHUNK, ForestEvaluator, export_forest
+
+def training_data(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(0, 5, rows),
+        rng.integers(0, 2, rows),
+        rng.random(rows) * 4,
+        rng.integers(0, 2, rows),
+        rng.integers(0, 30, rows),
+        rng.uniform(3, 5, rows).round(1),
+        rng.integers(0, 40, rows),
+        rng.random(rows),
+    ]).astype(float)
+    y = X @ rng.random(X.shape[1]) / 40 + rng.normal(0, 0.05, rows)
+    return X, y
+
+def test_forest_matches_sklearn_exactly():
+    X, y = training_data()
+    model = RandomForestRegressor(n_estimators=25, min_samples_leaf=2, random_state=42).fit(X, y)
+    evaluator = ForestEvaluator(export_forest(model))
+
+    # More rows than one evaluation chunk holds, so the sliced path runs too
+    X_test, _ = training_data(rows=3 * PAIRS_PER_CHUNK // 25, seed=1)
+    np.testing.assert_array_equal(evaluator.predict(X_test), model.predict(X_test))
+    np.testing.assert_array_equal(evaluator.predict(X[:7]), model.predict(X[:7]))
+
+def test_single_tree_matches_sklearn_exactly():
+    X, y = training_data()
+    model = DecisionTreeRegressor(random_state=0).fit(X, y)
+    X_test, _ = training_data(rows=500, seed=2)
+    np.testing.assert_array_equal(ForestEvaluator(export_forest(model)).predict(X_test), model.predict(X_test))
+
+def test_values_next_to_thresholds():
+    # Values one float64 step above a split threshold round onto it in
+    # float32; they must go the same way as in sklearn
+    X, y = training_data(rows=500, seed=3)
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    arrays = export_forest(model)
+    splits = arrays['threshold'][(arrays['feature'] == 2) & (arrays['left'] != np.arange(len(arrays['left'])))]
+    X_test = np.repeat(X[:1], len(splits), axis=0)
+    X_test[:, 2] = np.nextafter(splits, np.inf)
+    np.testing.assert_array_equal(ForestEvaluator(arrays).predict(X_test), model.predict(X_test))
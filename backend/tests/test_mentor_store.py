@@ -0,0 +1,48 @@
+import random
+import numpy as np
+import pytest
+from embeddings import get_embedder
+from features import build_feature_matrix
+from mentor_store import MentorStore
+from test_features import Word2Vec, profile
+
+def store_state(store):
+    n = len(store)
+    return (dict(store.slots), list(store.profiles), list(store.fingerprints),
+            store.experience[:n].copy(), store.profile_vectors[:n].copy())
+
+@pytest.mark.parametrize('bad', [
+    {"experienceYears": 'ten'},
+    {"rating": None},
+    {"industry": 'tech'},
+    {"location": ['Pune']},
+    {"skills": ['Python']},
+    {"interests": [{"name": 'Data'}]},
+    {"bio": 42},
+    {"id": {"nested": 1}},
+])
+def test_malformed_mentor_leaves_store_unchanged(bad):
+    rng = random.Random(1)
+    store = MentorStore(get_embedder(Word2Vec()))
+    mentors = [profile(rng, i) for i in range(20)]
+    store.register(mentors)
+    before = store_state(store)
+
+    # A valid update and a new mentor sent along with the bad one are not stored either
+    batch = [dict(mentors[0], rating=1.0), profile(rng, 100), dict(profile(rng, 101), **bad)]
+    with pytest.raises(ValueError):
+        store.register(batch)
+
+    after = store_state(store)
+    assert after[:3] == before[:3]
+    np.testing.assert_array_equal(after[3], before[3])
+    np.testing.assert_array_equal(after[4], before[4])
+
+    # The store keeps working: more mentors register and score like inline lists
+    mentors += [profile(rng, i) for i in range(20, 30)]
+    assert store.register(mentors[20:]) == 30
+    student = profile(rng, 0)
+    slots = store.resolve()
+    np.testing.assert_allclose(store.feature_matrix(student, slots),
+                               build_feature_matrix(student, store.get_profiles(slots), store.embedder),
+                               rtol=0, atol=1e-6)
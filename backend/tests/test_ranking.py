@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from ranking import keep_best, rank_mentors, select_top
+
+def full_sort(scores):
+    return np.argsort(-np.asarray(scores, dtype=float), kind='stable')
+
+@pytest.mark.parametrize('seed', range(5))
+def test_select_top_matches_a_full_stable_sort(seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct values, so most pages start or end inside a run of ties
+    scores = rng.integers(0, 6, 200)
+    order = full_sort(scores)
+    for top_k, offset in [(1, 0), (10, 0), (10, 25), (37, 163), (200, 0), (None, 0), (None, 50), (0, 0)]:
+        end = len(scores) if top_k is None else offset + top_k
+        np.testing.assert_array_equal(select_top(scores, top_k, offset), order[offset:end])
+
+def test_ties_at_the_k_boundary_keep_input_order():
+    scores = [5, 9, 7, 7, 3, 7, 7, 1]
+    # The four 7s straddle the page boundary: the first two in input order
+    # end page one, the last two start page two
+    np.testing.assert_array_equal(select_top(scores, 3), [1, 2, 3])
+    np.testing.assert_array_equal(select_top(scores, 3, offset=3), [5, 6, 0])
+
+@pytest.mark.parametrize('top_k', [5, 6, 100])
+def test_k_at_least_n_returns_every_mentor_sorted(top_k):
+    scores = [2, 8, 8, 0, 5]
+    np.testing.assert_array_equal(select_top(scores, top_k), [1, 2, 4, 0, 3])
+
+def test_offset_past_the_end_is_empty():
+    assert len(select_top([3, 1, 2], top_k=2, offset=3)) == 0
+
+def test_rank_mentors_pages_agree_with_the_full_ranking():
+    rng = np.random.default_rng(7)
+    scores = rng.integers(40, 60, 50)
+    mentors = [{"id": i, "name": f"mentor {i}"} for i in range(len(scores))]
+    ranked = [entry["id"] for entry in rank_mentors(mentors, scores)]
+    assert ranked == full_sort(scores).tolist()
+
+    pages = [rank_mentors(mentors, scores, top_k=8, offset=offset) for offset in range(0, 56, 8)]
+    assert [entry["id"] for page in pages for entry in page] == ranked
+    assert all(entry["matchScore"] == scores[entry["id"]] for page in pages for entry in page)
+
+def test_rank_mentors_fields_and_subset_indices():
+    mentors = [{"id": i, "name": f"mentor {i}", "bio": "..."} for i in range(6)]
+    indices = np.array([1, 3, 4])
+    entries = rank_mentors(mentors, np.array([70, 90, 70]), top_k=2, fields=["id", "name"], indices=indices)
+    assert entries == [{"id": 3, "name": "mentor 3", "matchScore": 90},
+                       {"id": 1, "name": "mentor 1", "matchScore": 70}]
+    # Entries are copies
+    assert "matchScore" not in mentors[3]
+
+def test_keep_best_keeps_everything_that_can_reach_the_page():
+    scores = np.array([4, 9, 4, 1, 9, 4])
+    indices = np.arange(10, 16)
+    kept, kept_scores = keep_best(indices, scores, keep=3)
+    np.testing.assert_array_equal(kept, [10, 11, 14])
+    np.testing.assert_array_equal(kept_scores, [4, 9, 9])